@@ -0,0 +1,12 @@
+# gunicorn.conf.py — gunicorn loads this automatically when started from the
+# project root (e.g. `gunicorn tribe_inventory.wsgi`). Server settings still
+# come from the command line / GUNICORN_CMD_ARGS / WEB_CONCURRENCY as before.
+
+
+def post_worker_init(worker):
+    """Warm the worker (DB connection, URLconf, templates, lookup caches) before it accepts requests."""
+    from inventory import warmup
+
+    state = warmup.run(log=worker.log.info)
+    for error in state["errors"]:
+        worker.log.warning("warm-up: %s", error)
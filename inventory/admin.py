@@ -1,10 +1,16 @@
 # inventory/admin.py
 from django.contrib import admin, messages
-from django.urls import path
+from django.db import transaction
+from django.utils.html import format_html
+from django.urls import path, reverse
 from django.shortcuts import redirect, render
 import csv, io
 
-from .models import Hub, User, SKU, Inventory, InventoryLog, Shipment, ShipmentLine, HubSKU
+from .models import (
+    Hub, User, SKU, Inventory, InventoryLog, Shipment, ShipmentLine, HubSKU,
+    CountSession, Receipt, ReceiptLine, Reservation,
+)
+from .shipments import dispatch_transfer
 
 
 @admin.register(Hub)
@@ -41,7 +47,7 @@ class SKUAdmin(admin.ModelAdmin):
         ]
         return my_urls + urls
 
-        def upload_csv(self, request):
+    def upload_csv(self, request):
         """
         Admin view to upload SKUs via CSV.
         Expected columns (header row optional but recommended):
@@ -102,52 +108,126 @@ class SKUAdmin(admin.ModelAdmin):
                 )
             return redirect("admin:inventory_sku_changelist")
 
-        # GET -> inline minimal form (no template needed)
-        return HttpResponse(
-            """
-            <div style="padding:20px;font-family:system-ui,Arial,sans-serif">
-              <h1>Upload SKUs CSV</h1>
-              <p>Expected columns: <code>sku,name,barcode,low_stock_threshold</code></p>
-              <form method="post" enctype="multipart/form-data" style="margin-top:12px">
-                """ + (f"{csrf}" if False else "") + """
-                <input type="hidden" name="csrfmiddlewaretoken" value='""" + getattr(request, "csrf_processing_done", "").__class__.__name__ + """'>
-                <input type="file" name="file" accept=".csv" required>
-                <button type="submit" style="margin-left:8px;">Upload</button>
-                <a href="/admin/inventory/sku/" style="margin-left:8px;">Cancel</a>
-              </form>
-            </div>
-            """,
-            content_type="text/html",
-        )
-
-            return redirect("admin:inventory_sku_changelist")
-
         # GET – render a tiny upload form within admin chrome
         return render(request, "admin/inventory/sku/upload_csv.html", {})
 
 
 @admin.register(Inventory)
 class InventoryAdmin(admin.ModelAdmin):
-    list_display = ("hub", "sku", "qty")
+    list_display = ("hub", "sku", "qty", "reserved")
+    readonly_fields = ("reserved",)  # maintained by inventory/reservations.py
     list_filter = ("hub",)
     search_fields = ("sku__sku", "sku__name", "hub__name")
 
+    def save_model(self, request, obj, form, change):
+        """Admin qty edits land in the ledger too (reason ADMIN)."""
+        with transaction.atomic():
+            old_qty = 0
+            if obj.pk:
+                old_qty = Inventory.objects.select_for_update().values_list("qty", flat=True).get(pk=obj.pk)
+            super().save_model(request, obj, form, change)
+            if obj.qty != old_qty:
+                InventoryLog.objects.create(user=request.user, hub=obj.hub, sku=obj.sku,
+                                            change=obj.qty - old_qty, note="Admin edit", reason="ADMIN")
+
 
 @admin.register(InventoryLog)
 class InventoryLogAdmin(admin.ModelAdmin):
-    list_display = ("created_at", "user", "hub", "sku", "change", "note")
-    list_filter = ("hub", "user")
-    search_fields = ("sku__sku", "sku__name", "hub__name", "user__username")
+    list_display = ("created_at", "user", "hub", "sku", "change", "reason", "shipment", "batch_id", "note")
+    list_filter = ("reason", "hub", "user")
+    search_fields = ("sku__sku", "sku__name", "hub__name", "user__username", "=batch_id", "=transfer_id")
+    raw_id_fields = ("shipment",)
 
 
 class ShipmentLineInline(admin.TabularInline):
     model = ShipmentLine
     extra = 0
     autocomplete_fields = ("sku",)
+    readonly_fields = ("received_qty",)  # only receipts change it
+
+
+class ReceiptInline(admin.TabularInline):
+    model = Receipt
+    extra = 0
+    can_delete = False
+    readonly_fields = ("created_at", "user", "closed")
+    fields = ("created_at", "user", "closed")
+
+    def has_add_permission(self, request, obj=None):
+        return False
 
 
 @admin.register(Shipment)
 class ShipmentAdmin(admin.ModelAdmin):
-    list_display = ("id", "supplier", "dest_hub", "status", "created_at")
-    list_filter = ("status", "dest_hub")
-    inlines = [ShipmentLineInline]
+    list_display = ("id", "supplier", "source_hub", "dest_hub", "status", "created_at", "log_entries")
+    list_filter = ("status", "dest_hub", "source_hub")
+    inlines = [ShipmentLineInline, ReceiptInline]
+    actions = ["dispatch_transfers"]
+
+    @admin.action(description="Dispatch selected draft transfers")
+    def dispatch_transfers(self, request, queryset):
+        sent = 0
+        for shipment in queryset.filter(status="DRAFT", source_hub__isnull=False).order_by("id"):
+            try:
+                dispatch_transfer(request.user, shipment)
+                sent += 1
+            except ValueError as e:
+                self.message_user(request, str(e), level=messages.ERROR)
+        self.message_user(request, f"Dispatched {sent} transfers.")
+
+    @admin.display(description="Log")
+    def log_entries(self, obj):
+        url = reverse("admin:inventory_inventorylog_changelist") + f"?shipment__id__exact={obj.id}"
+        return format_html('<a href="{}">entries</a>', url)
+
+    def save_formset(self, request, form, formset, change):
+        """New shipment lines go in with one bulk insert instead of one save() each."""
+        if formset.model is not ShipmentLine:
+            return super().save_formset(request, form, formset, change)
+        instances = formset.save(commit=False)
+        for obj in formset.deleted_objects:
+            obj.delete()
+        for obj in instances:
+            if obj.pk:
+                obj.save()
+        ShipmentLine.objects.bulk_create([obj for obj in instances if not obj.pk])
+
+
+class ReceiptLineInline(admin.TabularInline):
+    model = ReceiptLine
+    extra = 0
+    can_delete = False
+    readonly_fields = ("line", "qty")
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(Receipt)
+class ReceiptAdmin(admin.ModelAdmin):
+    list_display = ("id", "shipment", "user", "created_at", "closed")
+    list_filter = ("closed", "shipment__dest_hub")
+    raw_id_fields = ("shipment",)
+    readonly_fields = ("shipment", "user", "created_at", "closed")
+    inlines = [ReceiptLineInline]
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(Reservation)
+class ReservationAdmin(admin.ModelAdmin):
+    list_display = ("id", "hub", "sku", "qty", "status", "reference", "user", "created_at", "expires_at")
+    list_filter = ("status", "hub")
+    search_fields = ("=reference", "sku__sku")
+    # Changing these by hand would put Inventory.reserved out of step; use the API / release_reservations.
+    readonly_fields = ("hub", "sku", "qty", "user", "reference", "status", "created_at", "expires_at", "closed_at")
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(CountSession)
+class CountSessionAdmin(admin.ModelAdmin):
+    list_display = ("id", "hub", "status", "opened_by", "created_at", "applied_at")
+    list_filter = ("status", "hub")
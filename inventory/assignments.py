@@ -0,0 +1,62 @@
+# inventory/assignments.py
+"""
+Bulk Hub ↔ SKU assignment: apply a desired state for many cells at once.
+"""
+from django.db import transaction
+
+from .cache import bump_hub_version
+from .models import HubSKU
+from .sync import HUBSKU, record_changes
+
+ACTIVE = "active"        # row exists, active
+INACTIVE = "inactive"    # row exists, inactive (keeps per-hub settings)
+ASSIGN = "assign"        # row exists; created active, existing flag left alone
+UNASSIGN = "unassign"    # existing row made inactive (keeps per-hub settings); none created
+REMOVE = "remove"        # no row
+STATES = (ACTIVE, INACTIVE, ASSIGN, UNASSIGN, REMOVE)
+
+
+def apply_assignments(desired):
+    """
+    desired: {(hub_id, sku_id): state}. Diffs against the existing HubSKU rows
+    for those SKUs in memory, then applies one bulk create, one bulk update of
+    `active` and one bulk delete. Returns {"created": n, "updated": n, "removed": n}.
+    """
+    sku_ids = {sku_id for _, sku_id in desired}
+    existing = {
+        (link.hub_id, link.sku_id): link
+        for link in HubSKU.objects.filter(sku_id__in=sku_ids).only("id", "hub_id", "sku_id", "active")
+    }
+
+    to_create, to_update, to_delete = [], [], []
+    for (hub_id, sku_id), state in desired.items():
+        if state not in STATES:
+            raise ValueError(f"Unknown assignment state: {state!r}")
+        link = existing.get((hub_id, sku_id))
+        if state == REMOVE:
+            if link:
+                to_delete.append(link)
+        elif state == UNASSIGN:
+            if link and link.active:
+                link.active = False
+                to_update.append(link)
+        elif link is None:
+            to_create.append(HubSKU(hub_id=hub_id, sku_id=sku_id, active=state != INACTIVE))
+        elif state != ASSIGN and link.active != (state == ACTIVE):
+            link.active = state == ACTIVE
+            to_update.append(link)
+
+    with transaction.atomic():
+        HubSKU.objects.bulk_create(to_create)
+        HubSKU.objects.bulk_update(to_update, ["active"])
+        if to_delete:
+            # queryset delete sends post_delete per row, which already records those
+            HubSKU.objects.filter(pk__in=[link.pk for link in to_delete]).delete()
+        changed = {}
+        for link in to_create + to_update:
+            changed.setdefault(link.hub_id, []).append(link.sku_id)
+        for hub_id, sku_ids in changed.items():
+            record_changes(HUBSKU, hub_id, sku_ids)
+        bump_hub_version(*{link.hub_id for link in to_create + to_update + to_delete})
+
+    return {"created": len(to_create), "updated": len(to_update), "removed": len(to_delete)}
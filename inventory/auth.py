@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+from .cache import cache_is_shared, user_cache_key
+
+USER_TTL = getattr(settings, "USER_CACHE_SECONDS", 300)
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    ModelBackend that serves request.user from the cache.
+
+    The cached object carries the role and the hub (select_related), so views
+    touching user.role / user.hub add no queries. inventory.signals drops the
+    entry whenever the user or their hub is saved or deleted; entries also
+    expire after USER_CACHE_SECONDS. With a per-process cache (LocMem) other
+    workers would never see those drops, so the user is read from the DB.
+    """
+
+    def get_user(self, user_id):
+        shared = cache_is_shared()
+        key = user_cache_key(user_id)
+        user = cache.get(key) if shared else None
+        if user is None:
+            UserModel = get_user_model()
+            try:
+                user = UserModel._default_manager.select_related("hub").get(pk=user_id)
+            except UserModel.DoesNotExist:
+                return None
+            if shared:
+                cache.set(key, user, USER_TTL)
+        return user if self.user_can_authenticate(user) else None
@@ -0,0 +1,239 @@
+# inventory/backup.py
+"""
+Streaming full-state backup / restore of inventory data.
+
+File format (gzip, UTF-8, one line per row):
+
+    \\!{"format": "tribe-inventory", "version": 1, ...}           file header
+    \\!{"model": "inventory.hub", "table": ..., "columns": [...]}   table header
+    <rows in PostgreSQL COPY text format: tab separated, \\N = NULL>
+    \\.                                                              end of table
+
+Rows are exactly what `COPY ... TO STDOUT` produces, so PostgreSQL dumps and
+loads with COPY; other databases (SQLite) go through cursors in chunks. Either
+way memory stays bounded. The export runs in one read-only snapshot.
+Users are not included: user references that don't exist in the target
+database are set to NULL on restore.
+"""
+import json
+import re
+from contextlib import contextmanager
+
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils.timezone import now
+
+from . import sync
+from .cache import bump_catalog_version, bump_hub_version
+from .models import (
+    SKU, Hub, HubSKU, Inventory, InventoryLog, InventoryShard, Receipt, ReceiptLine, Reservation, Shipment,
+    ShipmentLine, User,
+)
+
+FORMAT = "tribe-inventory"
+VERSION = 1
+CHUNK = 5000
+
+# Parents before children.
+MODELS = [
+    Hub, SKU, HubSKU, Inventory, InventoryShard, Reservation, Shipment, ShipmentLine, Receipt, ReceiptLine, InventoryLog,
+]
+
+_UNESCAPE = {"t": "\t", "n": "\n", "r": "\r", "\\": "\\"}
+_ESCAPED = re.compile(r"\\(.)")
+
+
+def _encode(value):
+    if value is None:
+        return r"\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    return (
+        str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+    )
+
+
+def _decode(text):
+    if text == r"\N":
+        return None
+    return _ESCAPED.sub(lambda m: _UNESCAPE.get(m.group(1), m.group(1)), text)
+
+
+def _columns(model):
+    return [f.column for f in model._meta.concrete_fields]
+
+
+@contextmanager
+def _snapshot():
+    """One consistent read view for the whole export."""
+    if connection.vendor == "sqlite":
+        # A deferred read transaction: WAL gives it a snapshot without blocking
+        # writers (atomic() would open an IMMEDIATE, i.e. write, transaction).
+        connection.ensure_connection()
+        with connection.cursor() as cursor:
+            cursor.execute("BEGIN DEFERRED")
+            try:
+                yield
+            finally:
+                cursor.execute("COMMIT")
+        return
+    with transaction.atomic():
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY")
+        yield
+
+
+def export(out):
+    """Write every table in MODELS to the text stream `out`. Returns {model label: rows}."""
+    counts = {}
+    out.write("\\!" + json.dumps({
+        "format": FORMAT, "version": VERSION, "created": now().isoformat(), "vendor": connection.vendor,
+    }) + "\n")
+    with _snapshot():
+        for model in MODELS:
+            table, columns = model._meta.db_table, _columns(model)
+            out.write("\\!" + json.dumps({"model": model._meta.label_lower, "table": table, "columns": columns}) + "\n")
+            counts[model._meta.label_lower] = _dump_table(out, model, table, columns)
+            out.write("\\.\n")
+    return counts
+
+
+def _dump_table(out, model, table, columns):
+    qn = connection.ops.quote_name
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY (SELECT {', '.join(map(qn, columns))} FROM {qn(table)} ORDER BY {qn(model._meta.pk.column)}) "
+                f"TO STDOUT",
+                out,
+            )
+            return cursor.rowcount
+    fields = [f.attname for f in model._meta.concrete_fields]
+    n = 0
+    for row in model.objects.order_by("pk").values_list(*fields).iterator(chunk_size=CHUNK):
+        out.write("\t".join(_encode(v) for v in row) + "\n")
+        n += 1
+    return n
+
+
+class _Section:
+    """File-like view of one table's rows, for COPY FROM STDIN; stops at the `\\.` line."""
+
+    def __init__(self, lines):
+        self._lines = lines
+        self._buffer = ""
+        self.done = False
+
+    def readline(self, size=-1):
+        if self.done:
+            return ""
+        line = next(self._lines, None)
+        if line is None:
+            raise ValueError("Backup file is truncated.")
+        if line.rstrip("\n") == "\\.":
+            self.done = True
+            return ""
+        return line
+
+    def read(self, size=-1):
+        while not self.done and (size < 0 or len(self._buffer) < size):
+            self._buffer += self.readline()
+        if size < 0:
+            data, self._buffer = self._buffer, ""
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+    def __iter__(self):
+        while (line := self.readline()):
+            yield line
+
+
+def _header(line, what):
+    if not line or not line.startswith("\\!"):
+        raise ValueError(f"Expected a {what} header, got: {(line or 'end of file')[:80]!r}")
+    return json.loads(line[2:])
+
+
+def restore(lines):
+    """
+    Load a backup (an iterator of text lines) into empty tables, in one
+    transaction. Returns {model label: rows}.
+    """
+    lines = iter(lines)
+    meta = _header(next(lines, None), "file")
+    if meta.get("format") != FORMAT or meta.get("version") != VERSION:
+        raise ValueError(f"Not a {FORMAT} v{VERSION} backup.")
+    by_label = {m._meta.label_lower: m for m in MODELS}
+    non_empty = [m._meta.label_lower for m in MODELS if m.objects.exists()]
+    if non_empty:
+        raise ValueError(f"Restore into empty tables only; already has data: {', '.join(non_empty)}.")
+
+    counts = {}
+    with transaction.atomic():
+        for line in lines:
+            section = _header(line, "table")
+            model = by_label.get(section["model"])
+            if model is None:
+                raise ValueError(f"Unknown model in backup: {section['model']}")
+            if section["columns"] != _columns(model):
+                raise ValueError(
+                    f"{section['model']}: backup columns {section['columns']} don't match this schema "
+                    f"({_columns(model)}); migrate first."
+                )
+            counts[section["model"]] = _load_table(model, _Section(lines))
+        _drop_missing_users()
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                for sql in connection.ops.sequence_reset_sql(no_style(), MODELS):
+                    cursor.execute(sql)
+        # Restored rows wrote no change feed: devices must start over from a snapshot.
+        sync.new_epoch()
+        transaction.on_commit(lambda: bump_hub_version(*Hub.objects.values_list("id", flat=True)))
+        transaction.on_commit(bump_catalog_version)
+    return counts
+
+
+def _load_table(model, section):
+    qn = connection.ops.quote_name
+    table, columns = model._meta.db_table, _columns(model)
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.copy_expert(f"COPY {qn(table)} ({', '.join(map(qn, columns))}) FROM STDIN", section)
+            return cursor.rowcount
+
+    fields = model._meta.concrete_fields
+    sql = (
+        f"INSERT INTO {qn(table)} ({', '.join(map(qn, columns))}) "
+        f"VALUES ({', '.join(['%s'] * len(columns))})"
+    )
+    n, chunk = 0, []
+    with connection.cursor() as cursor:
+        for line in section:
+            values = line.rstrip("\n").split("\t")
+            chunk.append([
+                f.get_db_prep_save(f.to_python(_decode(v)), connection) for f, v in zip(fields, values)
+            ])
+            if len(chunk) >= CHUNK:
+                cursor.executemany(sql, chunk)
+                n, chunk = n + len(chunk), []
+        if chunk:
+            cursor.executemany(sql, chunk)
+            n += len(chunk)
+    return n
+
+
+def _drop_missing_users():
+    """Null out references to users that only existed in the source database."""
+    qn = connection.ops.quote_name
+    users, user_pk = qn(User._meta.db_table), qn(User._meta.pk.column)
+    with connection.cursor() as cursor:
+        for model in MODELS:
+            for f in model._meta.concrete_fields:
+                if f.is_relation and f.related_model is User:
+                    table, col = qn(model._meta.db_table), qn(f.column)
+                    cursor.execute(
+                        f"UPDATE {table} SET {col} = NULL "
+                        f"WHERE {col} IS NOT NULL AND {col} NOT IN (SELECT {user_pk} FROM {users})"
+                    )
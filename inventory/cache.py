@@ -0,0 +1,96 @@
+# inventory/cache.py
+"""
+Version-keyed fragment caching.
+
+Each hub has a data version stored in the cache, plus one shared catalog
+version for SKU/Hub edits. Templates cache their fragments under a key built
+from those versions (see ``scope_key``); mutations bump the versions after
+commit, so old fragments are simply never looked up again. Nothing expires on
+a timer, as long as the cache is shared by every process (file, Redis,
+Memcached). A per-process cache (LocMemCache) never sees bumps made by other
+workers or by manage.py, so there versions only live LOCAL_VERSION_TTL
+seconds: pages may then be that much out of date, never more.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+HUB_VERSION_KEY = "inv:hub-version:{}"
+CATALOG_VERSION_KEY = "inv:catalog-version"
+LOCAL_VERSION_TTL = 10
+
+
+def cache_is_shared():
+    """False for per-process backends (LocMem, dummy), whose entries other workers and manage.py never see."""
+    return not settings.CACHES["default"]["BACKEND"].endswith(("LocMemCache", "DummyCache"))
+
+
+def _version_ttl():
+    return None if cache_is_shared() else LOCAL_VERSION_TTL
+
+
+def _new_version():
+    # Clock-seeded rather than a counter: if the cache evicts a version key we
+    # must never hand out a number that an old fragment was stored under.
+    return time.time_ns()
+
+
+def _get_versions(keys):
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            # add() so two processes racing on a cold key agree on one value
+            cache.add(key, _new_version(), _version_ttl())
+            found[key] = cache.get(key)
+    return found
+
+
+def scope_key(hub_ids):
+    """
+    Cache key fragment for a set of hubs, e.g. "c171.3:h1.172:h4.170".
+    Pass it as a vary_on argument to ``{% cache None "name" key %}``.
+    Read it *before* querying, so a concurrent bump can only make it stale.
+    """
+    hub_ids = sorted(set(hub_ids))
+    keys = [CATALOG_VERSION_KEY] + [HUB_VERSION_KEY.format(h) for h in hub_ids]
+    versions = _get_versions(keys)
+    parts = [f"c{versions[CATALOG_VERSION_KEY]}"]
+    parts += [f"h{h}.{versions[HUB_VERSION_KEY.format(h)]}" for h in hub_ids]
+    return ":".join(parts)
+
+
+def catalog_version():
+    """Current catalog version (changes whenever SKUs or hubs change)."""
+    return _get_versions([CATALOG_VERSION_KEY])[CATALOG_VERSION_KEY]
+
+
+def bump_hub_version(*hub_ids):
+    """Invalidate cached fragments for these hubs once the current transaction commits."""
+    keys = {HUB_VERSION_KEY.format(h) for h in hub_ids if h}
+    if keys:
+        transaction.on_commit(lambda: cache.set_many({k: _new_version() for k in keys}, _version_ttl()))
+
+
+def bump_catalog_version():
+    """Invalidate every hub's fragments (SKU names, hub names, ...)."""
+    transaction.on_commit(lambda: cache.set(CATALOG_VERSION_KEY, _new_version(), _version_ttl()))
+
+
+# ------------------------
+# Authenticated user cache
+# ------------------------
+
+USER_KEY = "inv:user:{}"
+
+
+def user_cache_key(user_id):
+    return USER_KEY.format(user_id)
+
+
+def invalidate_users(*user_ids):
+    """Drop cached request.user objects (role/hub/password changes) once committed."""
+    keys = [USER_KEY.format(u) for u in user_ids if u]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
@@ -0,0 +1,195 @@
+# inventory/catalog.py
+"""
+SKU catalog imports as plan → review → apply.
+
+plan_import() validates and normalizes CSV rows (across a process pool for
+big files), diffs them against one bulk-loaded snapshot of SKUs, hubs and
+HubSKU links, and returns a Changeset: what would be created, changed,
+linked or unlinked, plus bad and duplicate rows. A Changeset round-trips
+through JSON, so it can be reviewed (import_skus --dry-run, the upload
+preview) and applied later without re-reading the file.
+"""
+import csv
+import io
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+
+from django.db import transaction
+
+from .assignments import ACTIVE, REMOVE, apply_assignments
+from .cache import bump_catalog_version
+from .models import SKU, Hub, HubSKU
+
+REQUIRED_COLUMNS = {"sku", "name"}
+SKU_FIELDS = ("name", "barcode", "low_stock_threshold")
+CHUNK = 2000
+
+
+def read_catalog_csv(f, required=REQUIRED_COLUMNS):
+    """Text file → [(line_no, row)] with lower-cased headers; ValueError if required columns are missing."""
+    reader = csv.DictReader(f)
+    reader.fieldnames = [h.lower().strip() for h in reader.fieldnames or []]
+    missing = set(required) - set(reader.fieldnames)
+    if missing:
+        raise ValueError(f"CSV is missing required columns: {', '.join(sorted(missing))}")
+    return [(line_no, row) for line_no, row in enumerate(reader, start=2)]
+
+
+def _normalize_chunk(rows, default_threshold):
+    """Pure function (runs in worker processes): [(line_no, row)] → ([ok rows], [(line_no, error)])."""
+    ok, errors = [], []
+    for line_no, row in rows:
+        code = (row.get("sku") or "").strip()
+        name = (row.get("name") or "").strip()
+        if not code or not name:
+            errors.append((line_no, "missing sku or name"))
+            continue
+        threshold_raw = (row.get("low_stock_threshold") or "").strip()
+        try:
+            threshold = int(threshold_raw) if threshold_raw else default_threshold
+        except ValueError:
+            errors.append((line_no, f"{code}: low_stock_threshold {threshold_raw!r} is not a whole number"))
+            continue
+        hubs = []
+        for hub_name in (row.get("hubs") or "").split(","):
+            hub_name = hub_name.strip()
+            if hub_name and hub_name not in hubs:
+                hubs.append(hub_name)
+        ok.append({
+            "line": line_no, "sku": code, "name": name, "barcode": (row.get("barcode") or "").strip(),
+            "low_stock_threshold": threshold, "hubs": hubs,
+        })
+    return ok, errors
+
+
+def normalize_rows(rows, default_threshold=5, workers=1):
+    """Validate/normalize rows, in `workers` processes when the file is big enough to be worth it."""
+    chunks = [rows[i:i + CHUNK] for i in range(0, len(rows), CHUNK)]
+    if workers > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(workers) as pool:
+            results = list(pool.map(_normalize_chunk, chunks, [default_threshold] * len(chunks)))
+    else:
+        results = [_normalize_chunk(chunk, default_threshold) for chunk in chunks]
+    ok = [r for chunk_ok, _ in results for r in chunk_ok]
+    errors = [e for _, chunk_errors in results for e in chunk_errors]
+    return ok, errors
+
+
+@dataclass
+class Changeset:
+    create: list = field(default_factory=list)        # [{sku, name, barcode, low_stock_threshold}]
+    update: list = field(default_factory=list)        # [{sku, changes: {field: [old, new]}}]
+    unchanged: int = 0
+    new_hubs: list = field(default_factory=list)      # hub names get_or_create would add
+    link: list = field(default_factory=list)          # [[sku, hub name]] new or reactivated links
+    unlink: list = field(default_factory=list)        # [[sku, hub name]] (clear_assignments only)
+    errors: list = field(default_factory=list)        # [[line, message]]
+    duplicates: list = field(default_factory=list)    # [[line, sku]] earlier rows overridden by a later one
+
+    def summary(self):
+        return {
+            "create": len(self.create), "update": len(self.update), "unchanged": self.unchanged,
+            "new_hubs": len(self.new_hubs), "link": len(self.link), "unlink": len(self.unlink),
+            "errors": len(self.errors), "duplicates": len(self.duplicates),
+        }
+
+    @property
+    def has_changes(self):
+        return bool(self.create or self.update or self.new_hubs or self.link or self.unlink)
+
+    def to_dict(self):
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**{k: data[k] for k in cls.__dataclass_fields__ if k in data})
+
+
+def plan_import(rows, default_threshold=5, clear_assignments=False, workers=1):
+    """[(line_no, row)] → Changeset. Reads the database (3 queries), never writes."""
+    ok, errors = normalize_rows(rows, default_threshold, workers)
+
+    # Last occurrence of a code wins (as sequential update_or_create did).
+    latest, duplicates = {}, []
+    for row in ok:
+        if row["sku"] in latest:
+            duplicates.append([latest[row["sku"]]["line"], row["sku"]])
+        latest[row["sku"]] = row
+
+    existing = {s["sku"]: s for s in SKU.objects.filter(sku__in=list(latest)).values("sku", *SKU_FIELDS)}
+    hub_names = set(Hub.objects.values_list("name", flat=True))
+    links = {}
+    for code, hub_name, active in HubSKU.objects.filter(sku__sku__in=list(latest)).values_list(
+        "sku__sku", "hub__name", "active"
+    ):
+        links[(code, hub_name)] = active
+
+    cs = Changeset(errors=[list(e) for e in errors], duplicates=duplicates)
+    new_hubs = []
+    for code, row in latest.items():
+        values = {f: row[f] for f in SKU_FIELDS}
+        current = existing.get(code)
+        if current is None:
+            cs.create.append({"sku": code, **values})
+        else:
+            changes = {f: [current[f], values[f]] for f in SKU_FIELDS if current[f] != values[f]}
+            if changes:
+                cs.update.append({"sku": code, "changes": changes})
+            else:
+                cs.unchanged += 1
+        for hub_name in row["hubs"]:
+            if hub_name not in hub_names and hub_name not in new_hubs:
+                new_hubs.append(hub_name)
+            if links.get((code, hub_name)) is not True:
+                cs.link.append([code, hub_name])
+        if clear_assignments:
+            cs.unlink += [[c, h] for (c, h) in links if c == code and h not in row["hubs"]]
+    cs.new_hubs = new_hubs
+    return cs
+
+
+def apply_changeset(cs):
+    """Apply a Changeset in one transaction with bulk writes. Returns counts."""
+    with transaction.atomic():
+        Hub.objects.bulk_create([Hub(name=name) for name in cs.new_hubs], ignore_conflicts=True)
+        # Upsert, so a plan applied after someone added one of its SKUs still lands.
+        SKU.objects.bulk_create(
+            [SKU(**row) for row in cs.create],
+            batch_size=1000, update_conflicts=True, unique_fields=["sku"], update_fields=list(SKU_FIELDS),
+        )
+        skus = SKU.objects.in_bulk([u["sku"] for u in cs.update], field_name="sku")
+        for u in cs.update:
+            sku = skus.get(u["sku"])
+            if sku is not None:
+                for f, (_, new) in u["changes"].items():
+                    setattr(sku, f, new)
+        SKU.objects.bulk_update(list(skus.values()), list(SKU_FIELDS), batch_size=1000)
+
+        codes = {c for c, _ in cs.link + cs.unlink}
+        sku_ids = dict(SKU.objects.filter(sku__in=codes).values_list("sku", "id"))
+        hub_ids = dict(Hub.objects.filter(name__in={h for _, h in cs.link + cs.unlink}).values_list("name", "id"))
+        desired = {}
+        for pairs, state in ((cs.unlink, REMOVE), (cs.link, ACTIVE)):
+            for code, hub_name in pairs:
+                if code in sku_ids and hub_name in hub_ids:
+                    desired[(hub_ids[hub_name], sku_ids[code])] = state
+        links = apply_assignments(desired)
+        bump_catalog_version()
+    return {
+        "created": len(cs.create), "updated": len(skus), "hubs_created": len(cs.new_hubs),
+        "links_created": links["created"], "links_updated": links["updated"], "links_removed": links["removed"],
+    }
+
+
+def plan_upload(uploaded_file, **kwargs):
+    """
+    Plan from an uploaded CSV (bytes, utf-8 with or without BOM) with the web
+    upload's rules: only `sku` is required, a blank name defaults to the code,
+    and a hubs column is ignored (import_skus and the matrix assign hubs).
+    """
+    data = uploaded_file.read().decode("utf-8-sig", errors="ignore")
+    rows = read_catalog_csv(io.StringIO(data), required={"sku"})
+    for _, row in rows:
+        row["name"] = (row.get("name") or "").strip() or (row.get("sku") or "").strip()
+        row.pop("hubs", None)
+    return plan_import(rows, **kwargs)
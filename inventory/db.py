@@ -0,0 +1,67 @@
+# inventory/db.py
+"""
+Database helpers for the SQLite deployment mode (see DATABASES in settings).
+
+With WAL + IMMEDIATE transactions SQLite serializes writers, and busy_timeout
+makes them wait instead of failing. A writer can still give up under a long
+burst, so top-level write paths are wrapped in retry_on_db_lock.
+"""
+import functools
+import random
+import time
+
+from django.db import OperationalError, connection
+from django.utils.timezone import now
+
+LOCK_ERRORS = ("database is locked", "database table is locked", "database is busy")
+
+
+def is_lock_error(exc):
+    return isinstance(exc, OperationalError) and any(m in str(exc).lower() for m in LOCK_ERRORS)
+
+
+def retry_on_db_lock(func=None, *, attempts=5, base_delay=0.05, max_delay=1.0):
+    """
+    Retry a write on SQLite lock errors with bounded, jittered exponential backoff.
+
+    Only the outermost transaction is retried: inside an atomic block the
+    error is re-raised untouched, since the enclosing transaction has to be
+    rolled back and retried as a whole by its owner.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            for attempt in range(attempts):
+                try:
+                    return fn(*args, **kwargs)
+                except OperationalError as e:
+                    if not is_lock_error(e) or connection.in_atomic_block or attempt == attempts - 1:
+                        raise
+                    delay = min(max_delay, base_delay * 2 ** attempt)
+                    time.sleep(delay * random.uniform(0.5, 1.0))
+        return wrapper
+
+    return decorator(func) if func is not None else decorator
+
+
+def settled_before(settle):
+    """
+    Rows stamped before this time belong to finished transactions: no row with
+    a lower id can still commit. Ids are assigned at insert but become visible
+    at commit, so readers that keep an id watermark must not move it past rows
+    stamped later than this. On PostgreSQL that is the start of the oldest
+    open write transaction, less `settle` (a timedelta, for clock skew between
+    app servers and the DB); SQLite serializes writers (IMMEDIATE), so commit
+    order is id order there and `settle` alone is enough.
+    """
+    cutoff = now() - settle
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT min(xact_start) FROM pg_stat_activity "
+                "WHERE datname = current_database() AND backend_xid IS NOT NULL AND pid <> pg_backend_pid()"
+            )
+            oldest_writer = cursor.fetchone()[0]
+        if oldest_writer is not None:
+            cutoff = min(cutoff, oldest_writer - settle)
+    return cutoff
@@ -0,0 +1,134 @@
+# inventory/events.py
+"""
+Live stock-change events for dashboards (server-sent events, ASGI only).
+
+One Broadcaster per process fans events out to every open stream. Events are
+read from the SyncChange feed, so the source of truth is the database:
+
+- commits in this process (adjust_stock, receive_shipment, bulk writes) call
+  notify() via transaction.on_commit and wake the poller immediately;
+- commits in other workers are picked up by a single DB poll every
+  EVENTS_POLL_SECONDS (set it to 0 for single-worker deployments).
+
+The poll is one indexed query per process, however many displays are open,
+and it only runs while at least one stream is connected.
+"""
+import asyncio
+import threading
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Max
+from django.utils.timezone import now
+
+from .models import Inventory, SyncChange
+
+POLL_SECONDS = getattr(settings, "EVENTS_POLL_SECONDS", 5)
+BATCH = 500
+
+
+def fetch_events(after_id, hub_ids=None, limit=BATCH):
+    """Inventory changes after a feed id, with the current qty, one event per (hub, SKU)."""
+    qs = SyncChange.objects.filter(id__gt=after_id, kind="INVENTORY").order_by("id")
+    if hub_ids is not None:
+        qs = qs.filter(hub_id__in=hub_ids)
+    rows = list(qs.values_list("id", "hub_id", "sku_id", "created_at")[:limit])
+    if not rows:
+        return [], []
+    pairs = {(hub_id, sku_id) for _, hub_id, sku_id, _ in rows}
+    stock = {
+        (hub_id, sku_id): (code, qty)
+        for hub_id, sku_id, code, qty in Inventory.objects.filter(
+            hub_id__in={h for h, _ in pairs}, sku_id__in={s for _, s in pairs},
+        ).with_on_hand().values_list("hub_id", "sku_id", "sku__sku", "on_hand")
+    }
+    latest = {}
+    for change_id, hub_id, sku_id, _ in rows:
+        latest[(hub_id, sku_id)] = change_id
+    events = [
+        {"token": change_id, "hub": hub_id, "sku_id": sku_id,
+         "sku": stock.get((hub_id, sku_id), ("", 0))[0], "qty": stock.get((hub_id, sku_id), ("", 0))[1]}
+        for (hub_id, sku_id), change_id in sorted(latest.items(), key=lambda kv: kv[1])
+    ]
+    return events, rows
+
+
+def _last_change_id():
+    return SyncChange.objects.aggregate(m=Max("id"))["m"] or 0
+
+
+class Broadcaster:
+    def __init__(self):
+        self._subscribers = {}   # queue -> set of hub ids
+        self._lock = threading.Lock()
+        self._loop = None
+        self._wake = None
+        self._task = None
+
+    def subscribe(self, hub_ids):
+        """Register a stream (call from the event loop); returns its queue."""
+        queue = asyncio.Queue(maxsize=1000)
+        with self._lock:
+            self._subscribers[queue] = set(hub_ids)
+        if self._task is None or self._task.done():
+            self._loop = asyncio.get_running_loop()
+            self._wake = asyncio.Event()
+            self._task = self._loop.create_task(self._run())
+        return queue
+
+    def unsubscribe(self, queue):
+        with self._lock:
+            self._subscribers.pop(queue, None)
+        if self._wake is not None:
+            self._wake.set()  # let the poller notice and stop if idle
+
+    def notify(self):
+        """Wake the poller; safe to call from any thread (e.g. a transaction.on_commit hook)."""
+        loop, wake = self._loop, self._wake
+        if loop is not None and wake is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(wake.set)
+
+    async def _run(self):
+        # Ids commit out of order under concurrency, so only advance the
+        # watermark past settled rows and remember what was already sent.
+        settled_id = await sync_to_async(_last_change_id)()
+        sent = set()
+        settle = timedelta(seconds=getattr(settings, "SYNC_SETTLE_SECONDS", 2))
+        while self._subscribers:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=POLL_SECONDS or None)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            if not self._subscribers:
+                break
+            events, rows = await sync_to_async(fetch_events)(settled_id)
+            with self._lock:
+                subscribers = list(self._subscribers.items())
+            for event in events:
+                if event["token"] in sent:
+                    continue
+                sent.add(event["token"])
+                for queue, hub_ids in subscribers:
+                    if event["hub"] in hub_ids:
+                        try:
+                            queue.put_nowait(event)
+                        except asyncio.QueueFull:
+                            pass  # slow client; it resyncs from the page on reconnect
+            cutoff = now() - settle
+            for change_id, _, _, created_at in rows:
+                if created_at > cutoff:
+                    break
+                settled_id = change_id
+            sent = {t for t in sent if t > settled_id}
+            if len(rows) == BATCH:
+                self._wake.set()  # backlog: keep draining
+        self._task = None
+
+
+broadcaster = Broadcaster()
+
+
+def notify():
+    broadcaster.notify()
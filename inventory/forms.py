@@ -31,3 +31,15 @@ class HubFilterForm(forms.Form):
         required=False,
         empty_label="— Select a hub —"
     )
+
+class ShipmentCreateForm(forms.Form):
+    hub = forms.ModelChoiceField(queryset=Hub.objects.all().order_by("name"), empty_label="— Destination hub —")
+    asn_file = forms.FileField(required=False,
+                               help_text="Optional ASN CSV with headers: sku,qty (sku may be a barcode). "
+                                         "Replaces the lines below.")
+
+class ShipmentLineForm(forms.Form):
+    code = forms.CharField(required=False, max_length=64, label="SKU / barcode")
+    qty = forms.IntegerField(required=False, min_value=1)
+
+ShipmentLineFormSet = forms.formset_factory(ShipmentLineForm, extra=10)
@@ -0,0 +1,59 @@
+# inventory/log_refs.py
+"""
+Backfill of InventoryLog.reason / shipment / batch_id for rows written before
+those fields existed, by parsing the free-text note.
+
+backfill() takes the model classes as arguments so that migration
+0006_backfill_log_refs can pass its historical models; the backfill_log_refs
+command passes the real ones. It walks the table by id in chunks and only
+touches untagged rows, so it is safe to re-run.
+"""
+import re
+
+from django.db import transaction
+
+SHIPMENT_NOTE = re.compile(r"^Shipment (\d+)$")
+STOCKTAKE_NOTE = re.compile(r"^Stocktake #(\d+)$")
+SYNC_NOTE = re.compile(r"^Offline sync \((.+)\)$")
+
+
+def _tag(log, shipment_ids):
+    """Fill the fields a note implies; False if the note isn't one we recognise."""
+    note = (log.note or "").strip()
+    m = SHIPMENT_NOTE.match(note)
+    if m:
+        log.reason = "RECEIPT"
+        log.shipment_id = int(m.group(1)) if int(m.group(1)) in shipment_ids else None
+        return True
+    m = STOCKTAKE_NOTE.match(note)
+    if m:
+        log.reason, log.batch_id = "STOCKTAKE", f"stocktake-{m.group(1)}"
+        return True
+    m = SYNC_NOTE.match(note)
+    if m:
+        log.reason, log.batch_id = "SYNC", m.group(1)[:64]
+        return True
+    return False
+
+
+def backfill(InventoryLog, Shipment, chunk_size=5000, progress=None):
+    """Tag untagged log rows from their notes. Returns how many were tagged."""
+    shipment_ids = set(Shipment.objects.values_list("id", flat=True))
+    last_id = 0
+    updated = 0
+    while True:
+        rows = list(
+            InventoryLog.objects.filter(id__gt=last_id, reason="ADJUST", shipment__isnull=True, batch_id="")
+            .order_by("id").only("id", "note")[:chunk_size]
+        )
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        changed = [log for log in rows if _tag(log, shipment_ids)]
+        with transaction.atomic():
+            InventoryLog.objects.bulk_update(changed, ["reason", "shipment", "batch_id"], batch_size=1000)
+        updated += len(changed)
+        if progress:
+            progress(last_id, updated)
+    return updated
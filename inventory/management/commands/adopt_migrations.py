@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.migrations.recorder import MigrationRecorder
+
+INITIAL = ("inventory", "0001_initial")
+
+
+class Command(BaseCommand):
+    help = (
+        "Record inventory.0001_initial as applied on a database created before the app had\n"
+        "migrations (migrate --run-syncdb). `migrate --fake-initial` can't do it: admin and auth\n"
+        "are already recorded and depend on inventory.User, so migrate stops on the inconsistent\n"
+        "history first. Then run migrate to apply the rest."
+    )
+
+    def handle(self, *args, **opts):
+        recorder = MigrationRecorder(connection)
+        if INITIAL in recorder.applied_migrations():
+            self.stdout.write("inventory.0001_initial is already recorded; nothing to do.")
+            return
+        tables = set(connection.introspection.table_names())
+        missing = {"inventory_hub", "inventory_user", "inventory_sku", "inventory_inventory"} - tables
+        if missing:
+            raise CommandError(f"Not a pre-migrations database, missing {', '.join(sorted(missing))}: run migrate.")
+        recorder.record_applied(*INITIAL)
+        self.stdout.write(self.style.SUCCESS("Recorded inventory.0001_initial. Now run: manage.py migrate"))
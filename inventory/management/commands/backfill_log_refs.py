@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from inventory.log_refs import backfill
+from inventory.models import InventoryLog, Shipment
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill InventoryLog.reason / shipment / batch_id on rows written before those fields existed,\n"
+        "by parsing the free-text note. Migration 0006 runs this once; walks the table by id in chunks; safe to re-run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=5000)
+
+    def handle(self, *args, **opts):
+        updated = backfill(
+            InventoryLog, Shipment, chunk_size=opts["chunk_size"],
+            progress=lambda last_id, n: self.stdout.write(f"…through log #{last_id}: {n} rows tagged"),
+        )
+        self.stdout.write(self.style.SUCCESS(f"Backfill finished. {updated} log rows tagged."))
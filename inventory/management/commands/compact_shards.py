@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from inventory.sharding import compact
+
+
+class Command(BaseCommand):
+    help = (
+        "Fold sharded stock counters back into Inventory.qty.\n"
+        "Safe to run at any time (e.g. nightly); run it after turning counter_shards off for a SKU."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hub", type=int, help="Only this hub id.")
+
+    def handle(self, *args, **opts):
+        folded = compact(hub_id=opts["hub"])
+        self.stdout.write(self.style.SUCCESS(f"Compacted {folded} sharded counters."))
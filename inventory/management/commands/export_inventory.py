@@ -0,0 +1,28 @@
+import gzip
+import time
+
+from django.core.management.base import BaseCommand
+
+from inventory.backup import export
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream hubs, SKUs, assignments, stock, shipments and the inventory log to a\n"
+        "gzip file from one consistent snapshot (restore with import_inventory).\n"
+        "Users are not included."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Output file, e.g. inventory-2026-01-31.tsv.gz")
+        parser.add_argument("--level", type=int, default=6, help="gzip level 1-9 (default: 6).")
+
+    def handle(self, *args, **opts):
+        t0 = time.perf_counter()
+        with gzip.open(opts["path"], "wt", encoding="utf-8", newline="\n", compresslevel=opts["level"]) as out:
+            counts = export(out)
+        for label, n in counts.items():
+            self.stdout.write(f"  {label:<24} {n}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Exported {sum(counts.values())} rows to {opts['path']} in {time.perf_counter() - t0:.1f}s."
+        ))
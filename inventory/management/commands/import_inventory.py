@@ -0,0 +1,35 @@
+import gzip
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory.backup import restore
+
+
+class Command(BaseCommand):
+    help = (
+        "Restore a file written by export_inventory into a freshly migrated database\n"
+        "(the inventory tables must be empty). Runs in one transaction; user references\n"
+        "that don't exist here are set to NULL. Run rollup_movements --full afterwards\n"
+        "to rebuild movement reports."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File written by export_inventory.")
+
+    def handle(self, *args, **opts):
+        path = Path(opts["path"])
+        if not path.exists():
+            raise CommandError(f"File not found: {path}")
+        t0 = time.perf_counter()
+        try:
+            with gzip.open(path, "rt", encoding="utf-8", newline="\n") as f:
+                counts = restore(f)
+        except (ValueError, OSError) as e:
+            raise CommandError(str(e))
+        for label, n in counts.items():
+            self.stdout.write(f"  {label:<24} {n}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Restored {sum(counts.values())} rows in {time.perf_counter() - t0:.1f}s."
+        ))
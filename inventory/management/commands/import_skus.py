@@ -1,17 +1,20 @@
-import csv
+import json
+import os
 from pathlib import Path
 from django.core.management.base import BaseCommand, CommandError
-from inventory.models import SKU, Hub, HubSKU
+from inventory.catalog import Changeset, apply_changeset, plan_import, read_catalog_csv
 
 class Command(BaseCommand):
     help = (
         "Import or update SKUs from a CSV.\n"
         "Expected headers (case-insensitive): sku,name,barcode,low_stock_threshold,hubs\n"
         "- hubs = optional comma-separated list of hub names to assign (e.g. \"Hub 1, Hub 2\").\n"
+        "Use --dry-run to see what would change; --changeset-out saves that plan as JSON and\n"
+        "--apply-changeset applies a saved plan without re-reading the CSV.\n"
     )
 
     def add_arguments(self, parser):
-        parser.add_argument("csv_path", type=str, help="Path to CSV file")
+        parser.add_argument("csv_path", type=str, nargs="?", help="Path to CSV file")
         parser.add_argument(
             "--clear-hub-assignments",
             action="store_true",
@@ -23,79 +26,72 @@ class Command(BaseCommand):
             default=5,
             help="Default low_stock_threshold if missing/blank (default: 5)."
         )
+        parser.add_argument("--dry-run", action="store_true", help="Show the changes, write nothing.")
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Processes used to validate rows (default: CPU count)."
+        )
+        parser.add_argument("--changeset-out", type=str, help="Write the planned change set to this JSON file.")
+        parser.add_argument("--apply-changeset", type=str, help="Apply a change set JSON file instead of a CSV.")
 
     def handle(self, *args, **opts):
-        csv_path = Path(opts["csv_path"])
-        if not csv_path.exists():
-            raise CommandError(f"CSV not found: {csv_path}")
-
-        default_threshold = int(opts["default_threshold"])
-        clear_assignments = bool(opts["clear_hub_assignments"])
-
-        created_count = 0
-        updated_count = 0
-        assigned_links = 0
-
-        with csv_path.open(newline="", encoding="utf-8-sig") as f:
-            reader = csv.DictReader(f)
-            # normalize headers → lowercase
-            reader.fieldnames = [h.lower().strip() for h in reader.fieldnames]
-
-            required = {"sku", "name"}
-            missing = required - set(reader.fieldnames or [])
-            if missing:
-                raise CommandError(f"CSV is missing required columns: {', '.join(sorted(missing))}")
-
-            for row in reader:
-                sku_code = (row.get("sku") or "").strip()
-                name = (row.get("name") or "").strip()
-                barcode = (row.get("barcode") or "").strip()
-                th_raw = (row.get("low_stock_threshold") or "").strip()
-                hubs_raw = (row.get("hubs") or "").strip()  # e.g. "Hub 1, Hub 3"
-
-                if not sku_code or not name:
-                    self.stdout.write(self.style.WARNING(f"Skipping row missing sku/name: {row}"))
-                    continue
-
-                # threshold
+        if opts["apply_changeset"]:
+            try:
+                cs = Changeset.from_dict(json.loads(Path(opts["apply_changeset"]).read_text()))
+            except (OSError, ValueError, TypeError) as e:
+                raise CommandError(f"Cannot read change set: {e}")
+        else:
+            if not opts["csv_path"]:
+                raise CommandError("Give a CSV path or --apply-changeset.")
+            csv_path = Path(opts["csv_path"])
+            if not csv_path.exists():
+                raise CommandError(f"CSV not found: {csv_path}")
+            with csv_path.open(newline="", encoding="utf-8-sig") as f:
                 try:
-                    threshold = int(th_raw) if th_raw != "" else default_threshold
-                except ValueError:
-                    threshold = default_threshold
-
-                sku_obj, created = SKU.objects.update_or_create(
-                    sku=sku_code,
-                    defaults={
-                        "name": name,
-                        "barcode": barcode,
-                        "low_stock_threshold": threshold,
-                    },
-                )
-                if created:
-                    created_count += 1
-                    action = "created"
-                else:
-                    updated_count += 1
-                    action = "updated"
+                    rows = read_catalog_csv(f)
+                except ValueError as e:
+                    raise CommandError(str(e))
+            cs = plan_import(
+                rows,
+                default_threshold=int(opts["default_threshold"]),
+                clear_assignments=bool(opts["clear_hub_assignments"]),
+                workers=max(int(opts["workers"]), 1),
+            )
 
-                # hub assignments
-                if clear_assignments:
-                    HubSKU.objects.filter(sku=sku_obj).delete()
-
-                if hubs_raw:
-                    hub_names = [h.strip() for h in hubs_raw.split(",") if h.strip()]
-                    for hub_name in hub_names:
-                        hub, _ = Hub.objects.get_or_create(name=hub_name)
-                        link, link_created = HubSKU.objects.get_or_create(hub=hub, sku=sku_obj, defaults={"active": True})
-                        if not link.active:
-                            link.active = True
-                            link.save(update_fields=["active"])
-                        if link_created:
-                            assigned_links += 1
-
-                self.stdout.write(self.style.SUCCESS(f"{action}: {sku_obj.sku} ({sku_obj.name})"))
+        self.write_plan(cs)
+        if opts["changeset_out"]:
+            Path(opts["changeset_out"]).write_text(json.dumps(cs.to_dict(), indent=1))
+            self.stdout.write(f"Change set written to {opts['changeset_out']}")
+        if opts["dry_run"]:
+            self.stdout.write(self.style.NOTICE("Dry run: nothing written."))
+            return
 
+        result = apply_changeset(cs)
         self.stdout.write(self.style.NOTICE(f"\nSummary:"))
-        self.stdout.write(self.style.NOTICE(f"  SKUs created: {created_count}"))
-        self.stdout.write(self.style.NOTICE(f"  SKUs updated: {updated_count}"))
-        self.stdout.write(self.style.NOTICE(f"  Hub↔SKU links created: {assigned_links}"))
+        self.stdout.write(self.style.NOTICE(f"  SKUs created: {result['created']}"))
+        self.stdout.write(self.style.NOTICE(f"  SKUs updated: {result['updated']}"))
+        self.stdout.write(self.style.NOTICE(f"  Hubs created: {result['hubs_created']}"))
+        self.stdout.write(self.style.NOTICE(f"  Hub↔SKU links created: {result['links_created']}"))
+        self.stdout.write(self.style.NOTICE(f"  Hub↔SKU links reactivated: {result['links_updated']}"))
+        self.stdout.write(self.style.NOTICE(f"  Hub↔SKU links removed: {result['links_removed']}"))
+
+    def write_plan(self, cs):
+        for row in cs.create:
+            self.stdout.write(self.style.SUCCESS(f"+ {row['sku']} ({row['name']})"))
+        for row in cs.update:
+            changes = ", ".join(f"{f}: {old!r} → {new!r}" for f, (old, new) in row["changes"].items())
+            self.stdout.write(f"~ {row['sku']}: {changes}")
+        for name in cs.new_hubs:
+            self.stdout.write(self.style.WARNING(f"+ hub {name!r} (does not exist yet)"))
+        for code, hub in cs.link:
+            self.stdout.write(f"+ {code} ↔ {hub}")
+        for code, hub in cs.unlink:
+            self.stdout.write(f"- {code} ↔ {hub}")
+        for line, code in cs.duplicates:
+            self.stdout.write(self.style.WARNING(f"line {line}: {code} appears again later; later row wins"))
+        for line, message in cs.errors:
+            self.stdout.write(self.style.ERROR(f"line {line}: {message} (skipped)"))
+        counts = ", ".join(f"{k} {v}" for k, v in cs.summary().items())
+        self.stdout.write(self.style.NOTICE(f"Plan: {counts}"))
@@ -0,0 +1,53 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from inventory.models import SKU, Hub
+from inventory.rebalance import DEFAULT_COVER_DAYS, DEFAULT_DAYS, create_drafts, discard_drafts, plan
+
+
+class Command(BaseCommand):
+    help = (
+        "Plan stock transfers between hubs to cover shortfalls from other hubs' surplus,\n"
+        "and write them as DRAFT transfer shipments (dispatch them from the admin).\n"
+        "Uses DailyMovement for daily demand (sales, not transfers or write-downs): run rollup_movements first.\n"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=DEFAULT_DAYS,
+                            help=f"Sales history used for daily demand (default: {DEFAULT_DAYS}).")
+        parser.add_argument("--cover-days", type=int, default=DEFAULT_COVER_DAYS,
+                            help=f"Days of demand a hub should hold, if above its reorder point (default: {DEFAULT_COVER_DAYS}).")
+        parser.add_argument("--min-qty", type=int, default=1, help="Skip moves smaller than this (default: 1).")
+        parser.add_argument("--replace", action="store_true", help="Discard undispatched draft transfers first.")
+        parser.add_argument("--dry-run", action="store_true", help="Show the plan, write nothing.")
+        parser.add_argument("--show", type=int, default=20, help="Largest moves to list (default: 20).")
+
+    def handle(self, *args, **opts):
+        # A dry run with --replace discards the drafts too, then rolls back, so it previews the real plan.
+        with transaction.atomic():
+            if opts["replace"]:
+                self.stdout.write(f"Discarded {discard_drafts()} draft transfers.")
+
+            t0 = time.perf_counter()
+            result = plan(days=max(opts["days"], 1), cover_days=opts["cover_days"], min_qty=max(opts["min_qty"], 1))
+            planned = time.perf_counter() - t0
+
+            hubs = dict(Hub.objects.values_list("id", "name"))
+            biggest = sorted(result.moves, key=lambda m: -m[3])[:opts["show"]]
+            codes = dict(SKU.objects.filter(id__in={m[2] for m in biggest}).values_list("id", "sku"))
+            for source_id, dest_id, sku_id, qty in biggest:
+                self.stdout.write(f"{codes[sku_id]}: {qty} from {hubs[source_id]} → {hubs[dest_id]}")
+            counts = ", ".join(f"{k} {v}" for k, v in result.summary().items())
+            self.stdout.write(self.style.NOTICE(f"Plan: {counts} ({planned:.2f}s)"))
+
+            if opts["dry_run"]:
+                transaction.set_rollback(True)
+                self.stdout.write(self.style.NOTICE("Dry run: nothing written."))
+                return
+            t0 = time.perf_counter()
+            shipments = create_drafts(result)
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {len(shipments)} draft transfers ({time.perf_counter() - t0:.2f}s)."
+        ))
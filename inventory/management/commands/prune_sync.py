@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from inventory.sync import prune
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete old delta-sync feed rows and push receipts.\n"
+        "Devices whose token is older than the retained feed get a full snapshot on next pull."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=30, help="Keep this many days (default: 30).")
+
+    def handle(self, *args, **opts):
+        changes, pushes = prune(days=opts["days"])
+        self.stdout.write(self.style.SUCCESS(f"Pruned {changes} changes and {pushes} push receipts."))
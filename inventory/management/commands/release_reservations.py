@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from inventory.reservations import SWEEP_BATCH, release_expired
+
+
+class Command(BaseCommand):
+    help = (
+        "Release expired stock reservations back to available-to-promise.\n"
+        "Run every minute or so (cron / systemd timer); safe to run concurrently."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch", type=int, default=SWEEP_BATCH, help=f"Rows per transaction (default: {SWEEP_BATCH}).")
+
+    def handle(self, *args, **opts):
+        n = release_expired(batch=opts["batch"])
+        self.stdout.write(self.style.SUCCESS(f"Released {n} expired reservations."))
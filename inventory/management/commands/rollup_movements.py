@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from inventory.rollup import run_rollup
+
+
+class Command(BaseCommand):
+    help = (
+        "Fold new InventoryLog rows into the DailyMovement rollup.\n"
+        "Only days touched by rows since the last run are recomputed; run it from cron (e.g. every 10 minutes)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--full", action="store_true", help="Clear the rollup and rebuild it from the whole log.")
+
+    def handle(self, *args, **opts):
+        buckets, rows = run_rollup(full=opts["full"])
+        self.stdout.write(self.style.SUCCESS(f"Recomputed {buckets} hub-days ({rows} rollup rows)."))
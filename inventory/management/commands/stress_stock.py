@@ -0,0 +1,84 @@
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Sum
+
+from inventory.models import SKU, Hub, HubSKU, Inventory, InventoryLog, User
+from inventory.services import adjust_stock
+
+
+class Command(BaseCommand):
+    help = (
+        "Hammer one (hub, SKU) pair with concurrent adjust_stock calls and report throughput.\n"
+        "Run once with --shards 0 and once with --shards N to compare; the final on-hand\n"
+        "is checked against the expected total and the log (no lost updates).\n"
+        "Meant for a staging database or a copy of a SQLite hub database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hub", required=True, help="Hub name.")
+        parser.add_argument("--sku", required=True, help="SKU code.")
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--ops", type=int, default=200, help="Adjustments per thread.")
+        parser.add_argument("--shards", type=int, default=0, help="counter_shards to use for the run (0 = off).")
+        parser.add_argument("--username", default="admin", help="User recorded on the log rows.")
+
+    def handle(self, *args, **opts):
+        try:
+            hub = Hub.objects.get(name=opts["hub"])
+            sku = SKU.objects.get(sku=opts["sku"])
+            user = User.objects.get(username=opts["username"])
+        except (Hub.DoesNotExist, SKU.DoesNotExist, User.DoesNotExist) as e:
+            raise CommandError(str(e))
+
+        link, _ = HubSKU.objects.get_or_create(hub=hub, sku=sku)
+        link.counter_shards = opts["shards"]
+        link.save()  # post_save drops the cached shard count
+
+        def on_hand():
+            row = Inventory.objects.filter(hub=hub, sku=sku).with_on_hand().values_list("on_hand", flat=True).first()
+            return row or 0
+
+        # Each thread does +2/-1 pairs: net +1 per pair, and decrements always have stock.
+        start_qty = on_hand()
+        first_log = InventoryLog.objects.order_by("-id").values_list("id", flat=True).first() or 0
+        errors = []
+
+        def worker():
+            try:
+                for _ in range(opts["ops"] // 2):
+                    adjust_stock(user, hub, sku, 2, note="stress", batch_id="stress")
+                    adjust_stock(user, hub, sku, -1, note="stress", batch_id="stress")
+            except Exception as e:  # report, don't hang the run
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(opts["threads"])]
+        t0 = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - t0
+
+        done = opts["threads"] * (opts["ops"] // 2) * 2
+        expected = start_qty + opts["threads"] * (opts["ops"] // 2)
+        final = on_hand()
+        logged = (
+            InventoryLog.objects.filter(id__gt=first_log, hub=hub, sku=sku, batch_id="stress")
+            .aggregate(s=Sum("change"))["s"] or 0
+        )
+        self.stdout.write(
+            f"shards={opts['shards']} threads={opts['threads']} ops={done} "
+            f"time={elapsed:.2f}s rate={done / elapsed:.0f} ops/s"
+        )
+        if errors:
+            self.stdout.write(self.style.ERROR(f"{len(errors)} worker(s) failed, first: {errors[0]!r}"))
+        if final != expected:
+            raise CommandError(f"On hand is {final}, expected {expected}.")
+        if final - start_qty != logged:
+            raise CommandError(f"On hand moved by {final - start_qty}, but the log records {logged}.")
+        self.stdout.write(self.style.SUCCESS(f"On hand {final} as expected."))
@@ -0,0 +1,228 @@
+import multiprocessing
+import random
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from types import SimpleNamespace
+
+from django.contrib import admin
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.db.models import OuterRef, Subquery, Sum
+
+from inventory.models import SKU, Hub, Inventory, InventoryLog, InventoryShard, Shipment, User
+from inventory.receiving import receive_shipment
+from inventory.services import adjust_stock
+from inventory.shipments import create_shipment
+
+OPS = ("adjust", "receive", "admin")
+
+
+def _timed_locks(stats):
+    """execute_wrapper: time spent in statements that take or wait for write locks."""
+    def wrapper(execute, sql, params, many, context):
+        statement = sql.lstrip().upper()
+        if not statement.startswith(("BEGIN", "UPDATE")) and "FOR UPDATE" not in statement:
+            return execute(sql, params, many, context)
+        t0 = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            stats["lock_wait"] += time.perf_counter() - t0
+    return wrapper
+
+
+def _worker(job):
+    """One thread or process: run `ops` random operations and return timings and outcomes."""
+    rng = random.Random(job["seed"])
+    user = User.objects.get(pk=job["user_id"])
+    hubs = Hub.objects.in_bulk(list({h for h, _ in job["pairs"]}))
+    skus = SKU.objects.in_bulk(list({s for _, s in job["pairs"]}))
+    inventory_admin = admin.site.get_model_admin(Inventory)
+    request = SimpleNamespace(user=user)
+    stats = {"lock_wait": 0.0, "latencies": [], "ops": Counter(), "outcomes": Counter(), "errors": []}
+
+    def run(op):
+        hub_id, sku_id = rng.choice(job["pairs"])
+        hub, sku = hubs[hub_id], skus[sku_id]
+        if op == "adjust":
+            delta = rng.choice([-1, 1]) * rng.randint(1, job["max_delta"])
+            try:
+                adjust_stock(user, hub, sku, delta, note="stress", batch_id="stress")
+            except ValueError:
+                return "insufficient"
+            return "ok"
+        if op == "receive":
+            shipment = Shipment(pk=rng.choice(job["shipments"]))
+            return "received" if receive_shipment(user, shipment) is not None else "already_received"
+        # The same code path as saving the change form in the admin.
+        obj = Inventory.objects.get(hub=hub, sku=sku)
+        obj.qty = rng.randint(0, job["max_delta"] * 10)
+        inventory_admin.save_model(request, obj, None, True)
+        return "ok"
+
+    # Everyone starts on the same shipment: the concurrent double-receive case.
+    plan = ["receive0"] + rng.choices(OPS, weights=job["mix"], k=job["ops"] - 1)
+    try:
+        with connection.execute_wrapper(_timed_locks(stats)):
+            for op in plan:
+                t0 = time.perf_counter()
+                try:
+                    if op == "receive0":
+                        op = "receive"
+                        ok = receive_shipment(user, Shipment(pk=job["shipments"][0])) is not None
+                        outcome = "received" if ok else "already_received"
+                    else:
+                        outcome = run(op)
+                except Exception as e:  # keep going; errors are part of the report
+                    outcome = "error"
+                    stats["errors"].append(f"{op}: {e!r}")
+                stats["latencies"].append(time.perf_counter() - t0)
+                stats["ops"][op] += 1
+                stats["outcomes"][f"{op}:{outcome}"] += 1
+    finally:
+        connection.close()
+    return stats
+
+
+def _pct(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p / 100))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Concurrent write stress test: random adjustments, admin qty edits and shipment\n"
+        "receipts (including several workers receiving the same shipment at once).\n"
+        "Afterwards checks that stock moved exactly as the log says, nothing is negative\n"
+        "and every shipment was applied once; reports ops/s, p50/p99 latency and time\n"
+        "spent waiting in locking statements. Writes real rows: use a scratch or staging database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=8)
+        parser.add_argument("--processes", action="store_true", help="Use processes instead of threads.")
+        parser.add_argument("--ops", type=int, default=200, help="Operations per worker.")
+        parser.add_argument("--hub", help="Limit to this hub name (default: all hubs).")
+        parser.add_argument("--skus", type=int, default=10, help="Number of SKUs to contend on.")
+        parser.add_argument("--shipments", type=int, default=5, help="Pending shipments to create and receive.")
+        parser.add_argument("--mix", default="80,10,10", help="Weights for adjust,receive,admin (default: 80,10,10).")
+        parser.add_argument("--max-delta", type=int, default=5)
+        parser.add_argument("--seed", type=int, default=None)
+        parser.add_argument("--username", default="admin", help="User recorded on the log rows.")
+
+    def handle(self, *args, **opts):
+        try:
+            user = User.objects.get(username=opts["username"])
+            mix = [int(w) for w in opts["mix"].split(",")]
+        except User.DoesNotExist:
+            raise CommandError(f"User '{opts['username']}' not found.")
+        except ValueError:
+            raise CommandError("--mix must be three integers, e.g. 80,10,10.")
+        if len(mix) != len(OPS):
+            raise CommandError("--mix must be three integers, e.g. 80,10,10.")
+
+        hubs = Hub.objects.all()
+        if opts["hub"]:
+            hubs = hubs.filter(name=opts["hub"])
+        hub_ids = list(hubs.values_list("id", flat=True))
+        sku_ids = list(SKU.objects.order_by("?").values_list("id", flat=True)[:opts["skus"]])
+        if not hub_ids or not sku_ids:
+            raise CommandError("Need at least one hub and one SKU.")
+        pairs = [(h, s) for h in hub_ids for s in sku_ids]
+        for h, s in pairs:
+            Inventory.objects.get_or_create(hub_id=h, sku_id=s)
+
+        rng = random.Random(opts["seed"])
+        shipments = []
+        for _ in range(max(opts["shipments"], 1)):
+            hub_id = rng.choice(hub_ids)
+            lines = {s: rng.randint(1, 20) for s in rng.sample(sku_ids, min(3, len(sku_ids)))}
+            shipments.append(create_shipment(user, Hub(pk=hub_id), lines).id)
+
+        def on_hand():
+            return dict(
+                ((h, s), q) for h, s, q in Inventory.objects.filter(hub_id__in=hub_ids, sku_id__in=sku_ids)
+                .with_on_hand().values_list("hub_id", "sku_id", "on_hand")
+            )
+
+        before = on_hand()
+        first_log = InventoryLog.objects.order_by("-id").values_list("id", flat=True).first() or 0
+
+        jobs = [
+            {"seed": rng.random(), "user_id": user.id, "pairs": pairs, "shipments": shipments,
+             "ops": max(opts["ops"], 1), "mix": mix, "max_delta": opts["max_delta"]}
+            for _ in range(opts["workers"])
+        ]
+        if opts["processes"]:
+            connections.close_all()  # children must not share the parent's connection
+            pool = ProcessPoolExecutor(opts["workers"], mp_context=multiprocessing.get_context("fork"))
+        else:
+            pool = ThreadPoolExecutor(opts["workers"])
+        t0 = time.perf_counter()
+        with pool:
+            results = list(pool.map(_worker, jobs))
+        elapsed = time.perf_counter() - t0
+
+        # Report
+        latencies = sorted(x for r in results for x in r["latencies"])
+        lock_wait = sum(r["lock_wait"] for r in results)
+        outcomes = sum((r["outcomes"] for r in results), Counter())
+        errors = [e for r in results for e in r["errors"]]
+        mode = "processes" if opts["processes"] else "threads"
+        self.stdout.write(
+            f"{opts['workers']} {mode}, {len(latencies)} ops in {elapsed:.2f}s = {len(latencies) / elapsed:.0f} ops/s\n"
+            f"latency p50 {_pct(latencies, 50) * 1000:.1f} ms, p99 {_pct(latencies, 99) * 1000:.1f} ms; "
+            f"lock wait {lock_wait:.2f}s total ({lock_wait / (elapsed * opts['workers']):.0%} of worker time)"
+        )
+        for key, n in sorted(outcomes.items()):
+            self.stdout.write(f"  {key:<28} {n}")
+
+        # Invariants
+        problems = []
+        after = on_hand()
+        logged = dict(
+            ((h, s), total) for h, s, total in InventoryLog.objects
+            .filter(id__gt=first_log, hub_id__in=hub_ids, sku_id__in=sku_ids)
+            .values_list("hub_id", "sku_id").annotate(total=Sum("change"))
+        )
+        for pair in pairs:
+            moved = after.get(pair, 0) - before.get(pair, 0)
+            if moved != logged.get(pair, 0):
+                problems.append(f"hub {pair[0]} sku {pair[1]}: stock moved {moved}, log says {logged.get(pair, 0)}")
+        negative = Inventory.objects.filter(hub_id__in=hub_ids, sku_id__in=sku_ids).with_on_hand().filter(on_hand__lt=0)
+        problems += [f"hub {h} sku {s}: on hand {q}" for h, s, q in negative.values_list("hub_id", "sku_id", "on_hand")]
+        problems += [
+            f"hub {h} sku {s} shard {k}: {q}"
+            for h, s, k, q in InventoryShard.objects.filter(qty__lt=0).values_list("hub_id", "sku_id", "shard", "qty")
+        ]
+        receipts = (
+            Shipment.objects.filter(id__in=shipments)
+            .annotate(
+                ordered=Sum("lines__qty"),
+                received=Sum("lines__received_qty"),
+                logged=Subquery(
+                    InventoryLog.objects.filter(shipment=OuterRef("pk"), reason="RECEIPT")
+                    .order_by().values("shipment").annotate(s=Sum("change")).values("s")
+                ),
+            )
+            .values_list("id", "status", "ordered", "received", "logged")
+        )
+        for shipment_id, status, ordered, received, logged in receipts:
+            # Workers always receive in full, so RECEIVED means everything was applied exactly once.
+            if (logged or 0) != received or received != (ordered if status == "RECEIVED" else 0):
+                problems.append(
+                    f"shipment {shipment_id} ({status}): ordered {ordered}, received {received}, logged {logged or 0}"
+                )
+
+        if errors:
+            self.stdout.write(self.style.WARNING(f"{len(errors)} operation(s) failed, first: {errors[0]}"))
+        if problems:
+            for p in problems[:20]:
+                self.stdout.write(self.style.ERROR(p))
+            raise CommandError(f"{len(problems)} invariant violation(s).")
+        self.stdout.write(self.style.SUCCESS(
+            f"Invariants hold: {len(pairs)} stock rows match the log, none negative, "
+            f"{len(shipments)} shipments applied at most once."
+        ))
@@ -0,0 +1,135 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:03
+#
+# Databases created before migrations existed (migrate --run-syncdb) already
+# have these tables: run `manage.py adopt_migrations`, then `migrate`.
+
+import django.contrib.auth.models
+import django.contrib.auth.validators
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Hub',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=64, unique=True)),
+                ('city', models.CharField(blank=True, max_length=64)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='User',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('password', models.CharField(max_length=128, verbose_name='password')),
+                ('last_login', models.DateTimeField(blank=True, null=True, verbose_name='last login')),
+                ('is_superuser', models.BooleanField(default=False, help_text='Designates that this user has all permissions without explicitly assigning them.', verbose_name='superuser status')),
+                ('username', models.CharField(error_messages={'unique': 'A user with that username already exists.'}, help_text='Required. 150 characters or fewer. Letters, digits and @/./+/-/_ only.', max_length=150, unique=True, validators=[django.contrib.auth.validators.UnicodeUsernameValidator()], verbose_name='username')),
+                ('first_name', models.CharField(blank=True, max_length=150, verbose_name='first name')),
+                ('last_name', models.CharField(blank=True, max_length=150, verbose_name='last name')),
+                ('email', models.EmailField(blank=True, max_length=254, verbose_name='email address')),
+                ('is_staff', models.BooleanField(default=False, help_text='Designates whether the user can log into this admin site.', verbose_name='staff status')),
+                ('is_active', models.BooleanField(default=True, help_text='Designates whether this user should be treated as active. Unselect this instead of deleting accounts.', verbose_name='active')),
+                ('date_joined', models.DateTimeField(default=django.utils.timezone.now, verbose_name='date joined')),
+                ('role', models.CharField(choices=[('ADMIN', 'ADMIN'), ('HUB', 'HUB'), ('RETAIL', 'RETAIL'), ('SUPPLIER', 'SUPPLIER')], default='HUB', max_length=20)),
+                ('groups', models.ManyToManyField(blank=True, help_text='The groups this user belongs to. A user will get all permissions granted to each of their groups.', related_name='user_set', related_query_name='user', to='auth.group', verbose_name='groups')),
+                ('user_permissions', models.ManyToManyField(blank=True, help_text='Specific permissions for this user.', related_name='user_set', related_query_name='user', to='auth.permission', verbose_name='user permissions')),
+                ('hub', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='inventory.hub')),
+            ],
+            options={
+                'verbose_name': 'user',
+                'verbose_name_plural': 'users',
+                'abstract': False,
+            },
+            managers=[
+                ('objects', django.contrib.auth.models.UserManager()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='HubSKU',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('active', models.BooleanField(default=True)),
+                ('reorder_point', models.PositiveIntegerField(blank=True, null=True)),
+                ('hub', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='inventory.hub')),
+            ],
+            options={
+                'verbose_name': 'Hub ↔ SKU',
+                'verbose_name_plural': 'Hubs ↔ SKUs',
+            },
+        ),
+        migrations.CreateModel(
+            name='Shipment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('PENDING', 'PENDING'), ('RECEIVED', 'RECEIVED')], default='PENDING', max_length=16)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('dest_hub', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='inventory.hub')),
+                ('supplier', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='supplier_user', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SKU',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sku', models.CharField(max_length=64, unique=True)),
+                ('name', models.CharField(max_length=120)),
+                ('barcode', models.CharField(blank=True, max_length=64)),
+                ('low_stock_threshold', models.IntegerField(default=5)),
+                ('hubs', models.ManyToManyField(blank=True, help_text='Assign this SKU to one or more hubs.', related_name='skus', through='inventory.HubSKU', to='inventory.hub')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ShipmentLine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('qty', models.IntegerField()),
+                ('shipment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='inventory.shipment')),
+                ('sku', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='inventory.sku')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='InventoryLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('change', models.IntegerField()),
+                ('note', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('hub', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='inventory.hub')),
+                ('user', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+                ('sku', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='inventory.sku')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='hubsku',
+            name='sku',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='inventory.sku'),
+        ),
+        migrations.CreateModel(
+            name='Inventory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('qty', models.IntegerField(default=0)),
+                ('hub', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='inventory.hub')),
+                ('sku', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='inventory.sku')),
+            ],
+            options={
+                'unique_together': {('hub', 'sku')},
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='hubsku',
+            unique_together={('hub', 'sku')},
+        ),
+    ]
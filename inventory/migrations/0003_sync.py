@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:03
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0002_stocktake'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('INVENTORY', 'INVENTORY'), ('HUBSKU', 'HUBSKU')], max_length=16)),
+                ('sku_id', models.BigIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('hub', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='inventory.hub')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['hub', 'id'], name='inventory_s_hub_id_0b8ebb_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='SyncPush',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('device_id', models.CharField(max_length=64)),
+                ('key', models.CharField(max_length=64)),
+                ('delta', models.IntegerField()),
+                ('status', models.CharField(choices=[('APPLIED', 'APPLIED'), ('REJECTED', 'REJECTED')], default='APPLIED', max_length=16)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('hub', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='inventory.hub')),
+                ('sku', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='inventory.sku')),
+                ('user', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('device_id', 'key')},
+            },
+        ),
+    ]
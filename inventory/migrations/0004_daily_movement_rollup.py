@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0003_sync'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('inbound_receipts', models.IntegerField(default=0)),
+                ('inbound_manual', models.IntegerField(default=0)),
+                ('outbound', models.IntegerField(default=0)),
+                ('net', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RollupState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=64, unique=True)),
+                ('last_log_id', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='inventorylog',
+            index=models.Index(fields=['hub', 'created_at'], name='inventory_i_hub_id_e4c1a6_idx'),
+        ),
+        migrations.AddField(
+            model_name='dailymovement',
+            name='hub',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='inventory.hub'),
+        ),
+        migrations.AddField(
+            model_name='dailymovement',
+            name='sku',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='inventory.sku'),
+        ),
+        migrations.AddIndex(
+            model_name='dailymovement',
+            index=models.Index(fields=['day'], name='inventory_d_day_2d9b36_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='dailymovement',
+            unique_together={('hub', 'day', 'sku')},
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0004_daily_movement_rollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inventorylog',
+            name='batch_id',
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='inventorylog',
+            name='reason',
+            field=models.CharField(choices=[('ADJUST', 'Manual adjustment'), ('RECEIPT', 'Shipment receipt'), ('STOCKTAKE', 'Stocktake correction'), ('SYNC', 'Offline device sync'), ('IMPORT', 'Import'), ('ADMIN', 'Admin edit'), ('TRANSFER', 'Transfer')], db_index=True, default='ADJUST', max_length=16),
+        ),
+        migrations.AddField(
+            model_name='inventorylog',
+            name='shipment',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='logs', to='inventory.shipment'),
+        ),
+        migrations.AddField(
+            model_name='inventorylog',
+            name='transfer_id',
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+    ]
@@ -0,0 +1,20 @@
+from django.db import migrations
+
+from inventory.log_refs import backfill
+
+
+def tag_existing_logs(apps, schema_editor):
+    backfill(apps.get_model("inventory", "InventoryLog"), apps.get_model("inventory", "Shipment"))
+
+
+class Migration(migrations.Migration):
+    # Chunked bulk updates, each in its own transaction: a large log is not tagged in one.
+    atomic = False
+
+    dependencies = [
+        ('inventory', '0005_inventorylog_refs'),
+    ]
+
+    operations = [
+        migrations.RunPython(tag_existing_logs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0006_backfill_log_refs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='hubsku',
+            name='counter_shards',
+            field=models.PositiveSmallIntegerField(default=0, help_text='For very hot SKUs: spread concurrent stock changes over this many sub-rows (0 = off).'),
+        ),
+        migrations.CreateModel(
+            name='InventoryShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shard', models.PositiveSmallIntegerField()),
+                ('qty', models.IntegerField(default=0)),
+                ('hub', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='inventory.hub')),
+                ('sku', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='inventory.sku')),
+            ],
+            options={
+                'unique_together': {('hub', 'sku', 'shard')},
+            },
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:03
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def mark_received_lines(apps, schema_editor):
+    # Before partial receiving, a RECEIVED shipment had taken in every line in full.
+    ShipmentLine = apps.get_model("inventory", "ShipmentLine")
+    ShipmentLine.objects.filter(shipment__status="RECEIVED").update(received_qty=models.F("qty"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0008_shipment_list_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Receipt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('closed', models.BooleanField(default=False, help_text='Shipment closed with this receipt (short lines written off).')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ReceiptLine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('qty', models.IntegerField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='shipmentline',
+            name='received_qty',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='shipment',
+            name='status',
+            field=models.CharField(choices=[('PENDING', 'PENDING'), ('PARTIAL', 'PARTIAL'), ('RECEIVED', 'RECEIVED')], default='PENDING', max_length=16),
+        ),
+        migrations.AddIndex(
+            model_name='shipment',
+            index=models.Index(condition=models.Q(('status__in', ['PENDING', 'PARTIAL'])), fields=['dest_hub', 'created_at'], name='shipment_open_by_hub'),
+        ),
+        migrations.AddField(
+            model_name='receipt',
+            name='shipment',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='receipts', to='inventory.shipment'),
+        ),
+        migrations.AddField(
+            model_name='receipt',
+            name='user',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='receiptline',
+            name='line',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='receipt_lines', to='inventory.shipmentline'),
+        ),
+        migrations.AddField(
+            model_name='receiptline',
+            name='receipt',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='inventory.receipt'),
+        ),
+        migrations.RunPython(mark_received_lines, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:03
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0009_receipts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inventory',
+            name='reserved',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='inventorylog',
+            name='reason',
+            field=models.CharField(choices=[('ADJUST', 'Manual adjustment'), ('RECEIPT', 'Shipment receipt'), ('STOCKTAKE', 'Stocktake correction'), ('SYNC', 'Offline device sync'), ('IMPORT', 'Import'), ('ADMIN', 'Admin edit'), ('TRANSFER', 'Transfer'), ('SALE', 'Sale (reservation)')], db_index=True, default='ADJUST', max_length=16),
+        ),
+        migrations.CreateModel(
+            name='Reservation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('qty', models.PositiveIntegerField()),
+                ('reference', models.CharField(blank=True, max_length=64)),
+                ('status', models.CharField(choices=[('ACTIVE', 'Active'), ('CONSUMED', 'Consumed'), ('RELEASED', 'Released'), ('EXPIRED', 'Expired')], default='ACTIVE', max_length=16)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('expires_at', models.DateTimeField()),
+                ('closed_at', models.DateTimeField(blank=True, null=True)),
+                ('hub', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='inventory.hub')),
+                ('sku', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='inventory.sku')),
+                ('user', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'expires_at'], name='inventory_r_status_8d1db9_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('reference', ''), _negated=True), fields=('hub', 'sku', 'reference'), name='reservation_unique_reference')],
+            },
+        ),
+    ]
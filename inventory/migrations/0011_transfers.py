@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0010_reservations'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shipment',
+            name='source_hub',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='outbound_shipments', to='inventory.hub'),
+        ),
+        migrations.AlterField(
+            model_name='shipment',
+            name='status',
+            field=models.CharField(choices=[('DRAFT', 'DRAFT'), ('PENDING', 'PENDING'), ('PARTIAL', 'PARTIAL'), ('RECEIVED', 'RECEIVED')], default='PENDING', max_length=16),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0012_syncepoch'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='hubsku',
+            name='counter_shards',
+            field=models.PositiveSmallIntegerField(default=0, help_text='For very hot SKUs on PostgreSQL: spread concurrent stock changes over this many sub-rows (0 = off; no gain on SQLite).'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0014_skuuploadplan'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dailymovement',
+            name='outbound_demand',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='shipment',
+            name='source_hub',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='outbound_shipments', to='inventory.hub'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0015_outbound_demand_protect_source_hub'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='inventorylog',
+            name='reason',
+            field=models.CharField(choices=[('ADJUST', 'Manual adjustment'), ('RECEIPT', 'Shipment receipt'), ('STOCKTAKE', 'Stocktake correction'), ('SYNC', 'Offline device sync'), ('ADMIN', 'Admin edit'), ('TRANSFER', 'Transfer'), ('SALE', 'Sale (reservation)')], db_index=True, default='ADJUST', max_length=16),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import AbstractUser
 
 
@@ -53,6 +54,12 @@ class HubSKU(models.Model):
     active = models.BooleanField(default=True)
     # Optional per-hub reorder point (overrides SKU.low_stock_threshold if set)
     reorder_point = models.PositiveIntegerField(null=True, blank=True)
+    # Hot SKUs: spread stock changes over N InventoryShard rows (0 = off)
+    counter_shards = models.PositiveSmallIntegerField(
+        default=0,
+        help_text="For very hot SKUs on PostgreSQL: spread concurrent stock changes over this many sub-rows "
+                  "(0 = off; no gain on SQLite)."
+    )
 
     class Meta:
         unique_together = ('hub', 'sku')
@@ -63,10 +70,35 @@ class HubSKU(models.Model):
         return f"{self.hub.name} ↔ {self.sku.sku} ({'active' if self.active else 'inactive'})"
 
 
+class SKUUploadPlan(models.Model):
+    """A previewed SKU upload (catalog.Changeset as JSON) waiting to be confirmed (views_skus.skus_upload)."""
+    user = models.ForeignKey('User', on_delete=models.CASCADE)
+    data = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+
+class InventoryQuerySet(models.QuerySet):
+    def with_on_hand(self):
+        """Annotate on_hand = qty + the pair's InventoryShard rows (hot SKUs, see inventory/sharding.py)."""
+        shards = (
+            InventoryShard.objects.filter(hub_id=models.OuterRef("hub_id"), sku_id=models.OuterRef("sku_id"))
+            .order_by().values("hub_id").annotate(total=models.Sum("qty")).values("total")
+        )
+        return self.annotate(on_hand=models.F("qty") + Coalesce(models.Subquery(shards), models.Value(0)))
+
+    def with_available(self):
+        """on_hand plus available = on_hand - reserved (available-to-promise; see inventory/reservations.py)."""
+        return self.with_on_hand().annotate(available=models.F("on_hand") - models.F("reserved"))
+
+
 class Inventory(models.Model):
     hub = models.ForeignKey(Hub, on_delete=models.CASCADE)
     sku = models.ForeignKey(SKU, on_delete=models.CASCADE)
     qty = models.IntegerField(default=0)
+    # Sum of ACTIVE Reservation.qty for this pair, kept in step by inventory/reservations.py
+    reserved = models.IntegerField(default=0)
+
+    objects = InventoryQuerySet.as_manager()
 
     class Meta:
         unique_together = ('hub', 'sku')
@@ -75,7 +107,61 @@ class Inventory(models.Model):
         return f"{self.hub} | {self.sku} = {self.qty}"
 
 
+class InventoryShard(models.Model):
+    """
+    Sub-counter for a hot (hub, SKU) pair (see inventory/sharding.py).
+    On hand = Inventory.qty + sum of the pair's shards; compaction folds
+    shards back into Inventory.qty.
+    """
+    hub = models.ForeignKey(Hub, on_delete=models.CASCADE)
+    sku = models.ForeignKey(SKU, on_delete=models.CASCADE)
+    shard = models.PositiveSmallIntegerField()
+    qty = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('hub', 'sku', 'shard')
+
+
+class Reservation(models.Model):
+    """An expiring hold on stock for a pending order (see inventory/reservations.py)."""
+    STATUS_CHOICES = [
+        ('ACTIVE', 'Active'),
+        ('CONSUMED', 'Consumed'),
+        ('RELEASED', 'Released'),
+        ('EXPIRED', 'Expired'),
+    ]
+    hub = models.ForeignKey(Hub, on_delete=models.CASCADE)
+    sku = models.ForeignKey(SKU, on_delete=models.CASCADE)
+    qty = models.PositiveIntegerField()
+    user = models.ForeignKey('User', on_delete=models.SET_NULL, null=True)
+    # Caller's order/cart id; makes retried reserve calls idempotent
+    reference = models.CharField(max_length=64, blank=True)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default='ACTIVE')
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+    closed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'expires_at'])]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['hub', 'sku', 'reference'],
+                condition=~models.Q(reference=''),
+                name='reservation_unique_reference',
+            ),
+        ]
+
+
 class InventoryLog(models.Model):
+    REASON_CHOICES = [
+        ('ADJUST', 'Manual adjustment'),
+        ('RECEIPT', 'Shipment receipt'),
+        ('STOCKTAKE', 'Stocktake correction'),
+        ('SYNC', 'Offline device sync'),
+        ('ADMIN', 'Admin edit'),
+        ('TRANSFER', 'Transfer'),
+        ('SALE', 'Sale'),
+    ]
     user = models.ForeignKey('User', on_delete=models.SET_NULL, null=True)
     hub = models.ForeignKey(Hub, on_delete=models.CASCADE)
     sku = models.ForeignKey(SKU, on_delete=models.CASCADE)
@@ -83,6 +169,15 @@ class InventoryLog(models.Model):
     note = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Structured provenance (indexed) — use these, not `note`, for lookups.
+    reason = models.CharField(max_length=16, choices=REASON_CHOICES, default='ADJUST', db_index=True)
+    shipment = models.ForeignKey('Shipment', on_delete=models.SET_NULL, null=True, blank=True, related_name='logs')
+    transfer_id = models.CharField(max_length=64, blank=True, db_index=True)
+    batch_id = models.CharField(max_length=64, blank=True, db_index=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['hub', 'created_at'])]
+
 
 class Shipment(models.Model):
     supplier = models.ForeignKey(
@@ -92,15 +187,159 @@ class Shipment(models.Model):
         related_name='supplier_user'
     )
     dest_hub = models.ForeignKey(Hub, on_delete=models.CASCADE)
+    # Set for hub-to-hub transfers (see inventory/rebalance.py); empty for supplier shipments.
+    # PROTECT: a transfer without its source would read as a supplier shipment.
+    source_hub = models.ForeignKey(
+        Hub, on_delete=models.PROTECT, null=True, blank=True, related_name='outbound_shipments'
+    )
     status = models.CharField(
         max_length=16,
-        choices=[('PENDING', 'PENDING'), ('RECEIVED', 'RECEIVED')],
+        choices=[('DRAFT', 'DRAFT'), ('PENDING', 'PENDING'), ('PARTIAL', 'PARTIAL'), ('RECEIVED', 'RECEIVED')],
         default='PENDING'
     )
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        # Keyset paging of the shipments list: newest first, per hub or overall.
+        indexes = [
+            models.Index(fields=['-created_at', '-id']),
+            models.Index(fields=['dest_hub', '-created_at', '-id']),
+            # Open receipts per hub (see receiving.open_receipts); only not-yet-closed rows are indexed.
+            models.Index(
+                fields=['dest_hub', 'created_at'],
+                condition=models.Q(status__in=['PENDING', 'PARTIAL']),
+                name='shipment_open_by_hub',
+            ),
+        ]
+
 
 class ShipmentLine(models.Model):
     shipment = models.ForeignKey(Shipment, on_delete=models.CASCADE, related_name='lines')
     sku = models.ForeignKey(SKU, on_delete=models.CASCADE)
     qty = models.IntegerField()
+    # Running total over all receipts; outstanding = qty - received_qty
+    received_qty = models.IntegerField(default=0)
+
+    @property
+    def outstanding(self):
+        return max(self.qty - self.received_qty, 0)
+
+    @property
+    def variance(self):
+        """Received minus ordered (negative = short)."""
+        return self.received_qty - self.qty
+
+
+class Receipt(models.Model):
+    """One receive event for a shipment (full or partial)."""
+    shipment = models.ForeignKey(Shipment, on_delete=models.CASCADE, related_name='receipts')
+    user = models.ForeignKey('User', on_delete=models.SET_NULL, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    closed = models.BooleanField(default=False, help_text="Shipment closed with this receipt (short lines written off).")
+
+
+class ReceiptLine(models.Model):
+    receipt = models.ForeignKey(Receipt, on_delete=models.CASCADE, related_name='lines')
+    line = models.ForeignKey(ShipmentLine, on_delete=models.CASCADE, related_name='receipt_lines')
+    qty = models.IntegerField()
+
+
+class CountSession(models.Model):
+    """
+    A stocktake (cycle count) of one hub. Opening it freezes a baseline:
+    one CountLine per stocked SKU with the book qty at that moment, plus the
+    last InventoryLog id so movements during the count can be accounted for.
+    """
+    STATUS_CHOICES = [('OPEN', 'OPEN'), ('APPLIED', 'APPLIED'), ('CANCELLED', 'CANCELLED')]
+    hub = models.ForeignKey(Hub, on_delete=models.CASCADE, related_name='count_sessions')
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default='OPEN')
+    opened_by = models.ForeignKey('User', on_delete=models.SET_NULL, null=True, related_name='count_sessions')
+    baseline_log_id = models.BigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    applied_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self) -> str:
+        return f"Count #{self.id} {self.hub} ({self.status})"
+
+
+class CountLine(models.Model):
+    session = models.ForeignKey(CountSession, on_delete=models.CASCADE, related_name='lines')
+    sku = models.ForeignKey(SKU, on_delete=models.CASCADE)
+    baseline_qty = models.IntegerField(default=0)
+    counted_qty = models.IntegerField(null=True, blank=True)  # None = not counted yet
+
+    class Meta:
+        unique_together = ('session', 'sku')
+
+
+class SyncChange(models.Model):
+    """
+    Append-only change feed for offline devices; the id is the change token.
+    Rows only say *what* changed (hub, kind, sku) — pulls read current state.
+    sku_id is a plain column so tombstones survive SKU deletion.
+    """
+    KIND_CHOICES = [('INVENTORY', 'INVENTORY'), ('HUBSKU', 'HUBSKU')]
+    hub = models.ForeignKey(Hub, on_delete=models.CASCADE, db_index=False)
+    kind = models.CharField(max_length=16, choices=KIND_CHOICES)
+    sku_id = models.BigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['hub', 'id'])]
+
+
+class SyncEpoch(models.Model):
+    """
+    Names this database's change feed; every sync token carries the latest
+    epoch. A new one (fresh database, restore) makes every device token stale,
+    so devices take a full snapshot instead of trusting ids from another feed.
+    """
+    value = models.CharField(max_length=16)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+
+class SyncPush(models.Model):
+    """One offline adjustment pushed by a device, keyed by its idempotency key."""
+    STATUS_CHOICES = [('APPLIED', 'APPLIED'), ('REJECTED', 'REJECTED')]
+    user = models.ForeignKey('User', on_delete=models.SET_NULL, null=True)
+    device_id = models.CharField(max_length=64)
+    key = models.CharField(max_length=64)
+    hub = models.ForeignKey(Hub, on_delete=models.CASCADE)
+    sku = models.ForeignKey(SKU, on_delete=models.CASCADE)
+    delta = models.IntegerField()
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default='APPLIED')
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('device_id', 'key')
+
+
+class DailyMovement(models.Model):
+    """
+    Per-day, per-hub, per-SKU movement totals rolled up from InventoryLog
+    (see inventory/rollup.py). `day` is the local date (settings.TIME_ZONE).
+    Inbound is split into shipment receipts and manual/other additions;
+    outbound is stored as a positive number, and outbound_demand is the part
+    of it that left as sales (see inventory/rollup.py) rather than
+    transfers, counts or write-downs.
+    """
+    day = models.DateField()
+    hub = models.ForeignKey(Hub, on_delete=models.CASCADE)
+    sku = models.ForeignKey(SKU, on_delete=models.CASCADE)
+    inbound_receipts = models.IntegerField(default=0)
+    inbound_manual = models.IntegerField(default=0)
+    outbound = models.IntegerField(default=0)
+    outbound_demand = models.IntegerField(default=0)
+    net = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('hub', 'day', 'sku')
+        indexes = [models.Index(fields=['day'])]
+
+
+class RollupState(models.Model):
+    """Watermark (last InventoryLog id folded in) for an incremental rollup."""
+    name = models.CharField(max_length=64, unique=True)
+    last_log_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
@@ -0,0 +1,175 @@
+# inventory/rebalance.py
+"""
+Rebalancing stock between hubs.
+
+plan() loads the whole catalog into dense hub × SKU matrices, one query per
+input:
+  - position: on hand − reserved, plus what is already on its way in (open
+    and draft shipments), minus what draft transfers will take out;
+  - reorder point: HubSKU.reorder_point, else SKU.low_stock_threshold;
+  - daily demand over the last `days` days: DailyMovement.outbound_demand,
+    i.e. sales only, not transfers, counts or write-downs (so it is as fresh
+    as the last rollup_movements run).
+For a SKU a hub carries (active HubSKU), the target is
+    max(reorder point, ceil(rate × cover_days))
+Stock above target, or any stock at a hub that doesn't carry the SKU, is
+surplus; the gap below target is shortfall. Surplus is matched to shortfall
+SKU by SKU in hub order (all SKUs at once, one pass per source hub). That
+moves min(total surplus, total shortfall) units of each SKU, the smallest
+total shortfall reachable without new stock.
+
+create_drafts() writes the moves as DRAFT transfer shipments, one per
+(source hub, destination hub), with two bulk inserts. Drafts change no stock
+until shipments.dispatch_transfer() sends them. Because drafts count as
+in flight, planning again only adds what is still missing.
+"""
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+import numpy as np
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils.timezone import localdate
+
+from .models import SKU, DailyMovement, Hub, HubSKU, Inventory, InventoryShard, Shipment, ShipmentLine
+from .receiving import OPEN_STATUSES
+
+DEFAULT_DAYS = 28
+DEFAULT_COVER_DAYS = 14
+
+
+@dataclass
+class RebalancePlan:
+    moves: list = field(default_factory=list)   # [(source hub id, dest hub id, sku id, qty)]
+    shortfall_before: int = 0                   # units below target, summed over hubs and SKUs
+    shortfall_after: int = 0                    # ... once every move has arrived
+    surplus: int = 0                            # movable units above target
+    skus_short: int = 0                         # SKUs still short somewhere after the plan
+
+    @property
+    def units(self):
+        return self.shortfall_before - self.shortfall_after
+
+    def summary(self):
+        return {
+            "moves": len(self.moves), "units": self.units, "shortfall_before": self.shortfall_before,
+            "shortfall_after": self.shortfall_after, "surplus": self.surplus, "skus_short": self.skus_short,
+        }
+
+
+def _rows(qs, *cols):
+    """values_list → int64 array of shape (n, len(cols))."""
+    return np.array(list(qs.values_list(*cols)), dtype=np.int64).reshape(-1, len(cols))
+
+
+def _scatter(matrix, rows, hub_ids, sku_ids, sign=1):
+    """Add rows of (hub id, sku id, value) into a hub × SKU matrix."""
+    if len(rows):
+        hi, si = np.searchsorted(hub_ids, rows[:, 0]), np.searchsorted(sku_ids, rows[:, 1])
+        np.add.at(matrix, (hi, si), sign * rows[:, 2])
+
+
+def load_matrices(days=DEFAULT_DAYS):
+    """Hub × SKU matrices of the planner's inputs (see the module docstring)."""
+    hub_ids = np.array(sorted(Hub.objects.values_list("id", flat=True)), dtype=np.int64)
+    skus = _rows(SKU.objects.order_by("id"), "id", "low_stock_threshold")
+    sku_ids = skus[:, 0]
+    shape = (len(hub_ids), len(sku_ids))
+
+    on_hand = np.zeros(shape, dtype=np.int64)
+    _scatter(on_hand, _rows(Inventory.objects.annotate(free=F("qty") - F("reserved")), "hub_id", "sku_id", "free"),
+             hub_ids, sku_ids)
+    _scatter(on_hand, _rows(InventoryShard.objects.all(), "hub_id", "sku_id", "qty"), hub_ids, sku_ids)
+
+    incoming = np.zeros(shape, dtype=np.int64)
+    _scatter(incoming, _rows(
+        ShipmentLine.objects.filter(shipment__status__in=("DRAFT", *OPEN_STATUSES), qty__gt=F("received_qty"))
+        .annotate(outstanding=F("qty") - F("received_qty")),
+        "shipment__dest_hub_id", "sku_id", "outstanding",
+    ), hub_ids, sku_ids)
+    # Drafts haven't taken their stock from the source yet.
+    _scatter(on_hand, _rows(
+        ShipmentLine.objects.filter(shipment__status="DRAFT", shipment__source_hub__isnull=False),
+        "shipment__source_hub_id", "sku_id", "qty",
+    ), hub_ids, sku_ids, sign=-1)
+
+    carried = np.zeros(shape, dtype=bool)
+    reorder_point = np.broadcast_to(skus[:, 1], shape).copy()
+    links = [(h, s, -1 if rp is None else rp)
+             for h, s, rp in HubSKU.objects.filter(active=True).values_list("hub_id", "sku_id", "reorder_point")]
+    if links:
+        links = np.array(links, dtype=np.int64)
+        hi, si = np.searchsorted(hub_ids, links[:, 0]), np.searchsorted(sku_ids, links[:, 1])
+        carried[hi, si] = True
+        override = links[:, 2] >= 0
+        reorder_point[hi[override], si[override]] = links[override, 2]
+
+    outbound = np.zeros(shape, dtype=np.int64)
+    _scatter(outbound, _rows(
+        DailyMovement.objects.filter(day__gt=localdate() - timedelta(days=days))
+        .values("hub_id", "sku_id").annotate(out=Sum("outbound_demand")),
+        "hub_id", "sku_id", "out",
+    ), hub_ids, sku_ids)
+
+    return {
+        "hub_ids": hub_ids, "sku_ids": sku_ids, "on_hand": on_hand, "incoming": incoming,
+        "carried": carried, "reorder_point": np.maximum(reorder_point, 0), "rate": outbound / days,
+    }
+
+
+def plan(days=DEFAULT_DAYS, cover_days=DEFAULT_COVER_DAYS, min_qty=1):
+    """Compute a transfer plan for every hub and SKU. Reads the database, never writes."""
+    m = load_matrices(days)
+    hub_ids, sku_ids = m["hub_ids"], m["sku_ids"]
+    target = np.where(
+        m["carried"], np.maximum(m["reorder_point"], np.ceil(m["rate"] * cover_days).astype(np.int64)), 0
+    )
+    position = m["on_hand"] + m["incoming"]
+    # Only stock that is physically there can leave.
+    surplus = np.clip(np.minimum(position - target, m["on_hand"]), 0, None)
+    shortfall = np.where(m["carried"], np.clip(target - position, 0, None), 0)
+
+    # Match per SKU (column): source i's surplus covers the interval [lo_out, hi_out) of
+    # that SKU's cumulative surplus, destination j's shortfall [lo_in, hi_in) of the
+    # cumulative shortfall; i sends j the overlap of the two.
+    hi_out, hi_in = np.cumsum(surplus, axis=0), np.cumsum(shortfall, axis=0)
+    lo_out, lo_in = hi_out - surplus, hi_in - shortfall
+    moves, moved = [], np.zeros(len(sku_ids), dtype=np.int64)
+    for i in np.flatnonzero(surplus.any(axis=1)):
+        qty = np.clip(np.minimum(hi_out[i], hi_in) - np.maximum(lo_out[i], lo_in), 0, None)
+        qty[qty < min_qty] = 0
+        for j, s in zip(*np.nonzero(qty)):
+            moves.append((int(hub_ids[i]), int(hub_ids[j]), int(sku_ids[s]), int(qty[j, s])))
+        moved += qty.sum(axis=0)
+
+    before = shortfall.sum(axis=0)
+    return RebalancePlan(
+        moves=moves,
+        shortfall_before=int(before.sum()),
+        shortfall_after=int((before - moved).sum()),
+        surplus=int(surplus.sum()),
+        skus_short=int(np.count_nonzero(before > moved)),
+    )
+
+
+def create_drafts(rebalance_plan):
+    """Write the plan as DRAFT transfer shipments (bulk inserts). Returns the shipments."""
+    by_route = {}
+    for source_id, dest_id, sku_id, qty in rebalance_plan.moves:
+        by_route.setdefault((source_id, dest_id), []).append((sku_id, qty))
+    with transaction.atomic():
+        shipments = Shipment.objects.bulk_create([
+            Shipment(source_hub_id=source_id, dest_hub_id=dest_id, status="DRAFT") for source_id, dest_id in by_route
+        ])
+        ShipmentLine.objects.bulk_create([
+            ShipmentLine(shipment=shipment, sku_id=sku_id, qty=qty)
+            for shipment, lines in zip(shipments, by_route.values())
+            for sku_id, qty in lines
+        ], batch_size=1000)
+    return shipments
+
+
+def discard_drafts():
+    """Delete draft transfers that haven't been dispatched. Returns how many."""
+    deleted = Shipment.objects.filter(status="DRAFT", source_hub__isnull=False).delete()[1]
+    return deleted.get(Shipment._meta.label, 0)
@@ -1,20 +1,109 @@
 # inventory/receiving.py
-from .models import Shipment
-from .services import adjust_stock
+"""
+Receiving shipments, in full or in parts.
 
-def receive_shipment(user, shipment: Shipment):
+Each receive is a Receipt with one ReceiptLine per line received (bulk
+insert). Only the newly received quantities are applied, to all SKUs at once
+with one UPDATE ... CASE, and logged with one bulk insert. The shipment is
+PARTIAL until every line is in (or it is closed short), then RECEIVED.
+"""
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, Sum, Value, When
+
+from .cache import bump_hub_version
+from .db import retry_on_db_lock
+from .models import Inventory, InventoryLog, Receipt, ReceiptLine, Shipment, ShipmentLine
+from .sync import INVENTORY, record_changes
+
+OPEN_STATUSES = ("PENDING", "PARTIAL")
+
+
+@retry_on_db_lock
+def receive_shipment(user, shipment: Shipment, quantities=None, close=False):
     """
-    Apply all shipment lines to inventory and mark as received.
+    Record a receipt and apply it to inventory.
+
+    quantities: {line_id: qty received now}; None receives everything still
+    outstanding. close=True marks the shipment RECEIVED even if lines are
+    short (the rest isn't coming). Returns the Receipt, or None if the
+    shipment was already received (double-submit, two people at once): the
+    shipment row lock makes that check and the receipt one transaction.
     """
-    if shipment.status == "RECEIVED":
-        return
-    for line in shipment.lines.select_related("sku"):
-        adjust_stock(
-            user=user,
-            hub=shipment.dest_hub,
-            sku=line.sku,
-            delta=line.qty,
-            note=f"Shipment {shipment.id}",
+    with transaction.atomic():
+        shipment = Shipment.objects.select_for_update().select_related("dest_hub").get(pk=shipment.pk)
+        if shipment.status == "RECEIVED":
+            return None
+        if shipment.status == "DRAFT":
+            raise ValueError(f"Shipment {shipment.id} is a draft transfer; dispatch it first.")
+        lines = list(ShipmentLine.objects.select_for_update().filter(shipment=shipment).order_by("id"))
+
+        received = {}
+        for line in lines:
+            qty = line.outstanding if quantities is None else quantities.get(line.id, 0)
+            if qty < 0:
+                raise ValueError(f"Line {line.id}: received quantity can't be negative.")
+            if qty > line.outstanding:
+                raise ValueError(f"Line {line.id}: receiving {qty}, but only {line.outstanding} outstanding.")
+            if qty:
+                received[line.id] = qty
+        if not received and not close and quantities is not None:
+            raise ValueError("Enter at least one received quantity.")
+
+        receipt = Receipt.objects.create(shipment=shipment, user=user, closed=close)
+        by_id = {line.id: line for line in lines}
+        ReceiptLine.objects.bulk_create([
+            ReceiptLine(receipt=receipt, line_id=line_id, qty=qty) for line_id, qty in received.items()
+        ])
+        for line_id, qty in received.items():
+            by_id[line_id].received_qty += qty
+        ShipmentLine.objects.bulk_update([by_id[i] for i in received], ["received_qty"])
+
+        deltas = {}
+        for line_id, qty in received.items():
+            sku_id = by_id[line_id].sku_id
+            deltas[sku_id] = deltas.get(sku_id, 0) + qty
+        if deltas:
+            _apply_deltas(user, shipment, receipt, deltas)
+
+        done = close or all(line.outstanding == 0 for line in lines)
+        shipment.status = "RECEIVED" if done else "PARTIAL"
+        shipment.save(update_fields=["status"])
+    return receipt
+
+
+def _apply_deltas(user, shipment, receipt, deltas):
+    """One set-based stock update for all SKUs, one bulk log insert."""
+    hub_id = shipment.dest_hub_id
+    Inventory.objects.bulk_create(
+        [Inventory(hub_id=hub_id, sku_id=sku_id, qty=0) for sku_id in deltas],
+        ignore_conflicts=True,
+    )
+    Inventory.objects.filter(hub_id=hub_id, sku_id__in=list(deltas)).update(
+        qty=F("qty") + Case(
+            *[When(sku_id=sku_id, then=Value(qty)) for sku_id, qty in deltas.items()],
+            default=Value(0), output_field=IntegerField(),
+        )
+    )
+    InventoryLog.objects.bulk_create([
+        InventoryLog(user=user, hub_id=hub_id, sku_id=sku_id, change=qty, note=f"Shipment {shipment.id}",
+                     reason="RECEIPT", shipment=shipment, batch_id=f"receipt-{receipt.id}")
+        for sku_id, qty in deltas.items()
+    ])
+    # update() and bulk_create() send no signals
+    record_changes(INVENTORY, hub_id, list(deltas))
+    bump_hub_version(hub_id)
+
+
+def open_receipts(hubs):
+    """Shipments still to be (fully) received at these hubs, with outstanding units, oldest first."""
+    return (
+        Shipment.objects.filter(dest_hub__in=hubs, status__in=OPEN_STATUSES)
+        .select_related("dest_hub", "supplier")
+        .annotate(
+            n_lines=Count("lines"),
+            units=Sum("lines__qty"),
+            received=Sum("lines__received_qty"),
+            outstanding=Sum(F("lines__qty") - F("lines__received_qty")),
         )
-    shipment.status = "RECEIVED"
-    shipment.save()
+        .order_by("created_at", "id")
+    )
@@ -0,0 +1,151 @@
+# inventory/reservations.py
+"""
+Expiring holds on stock and available-to-promise (ATP).
+
+Inventory.reserved is the sum of ACTIVE reservations for the pair, updated
+in the same transaction as every reservation change, so
+    available = on_hand - reserved
+is always current without scanning reservations (Inventory.objects.with_available()).
+Stock adjustments move on_hand and therefore ATP by themselves.
+
+A reservation ends by being consumed (the stock leaves: logged as SALE),
+released, or expiring; release_expired() sweeps expired holds in batches.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, IntegerField, Sum, Value, When
+from django.utils.timezone import now
+
+from . import services
+from .cache import bump_hub_version
+from .db import retry_on_db_lock
+from .models import Inventory, InventoryShard, Reservation
+
+DEFAULT_TTL = getattr(settings, "RESERVATION_TTL_SECONDS", 15 * 60)
+SWEEP_BATCH = 500
+
+
+def _available(inv):
+    """ATP for a locked Inventory row (base + shards - reserved)."""
+    shards = InventoryShard.objects.filter(hub_id=inv.hub_id, sku_id=inv.sku_id).aggregate(s=Sum("qty"))["s"] or 0
+    return inv.qty + shards - inv.reserved
+
+
+@retry_on_db_lock
+def reserve(user, hub, sku, qty, ttl=None, reference=""):
+    """
+    Hold `qty` units for `ttl` seconds. Raises ValueError if less is available.
+    With a reference, repeating the call returns the existing reservation;
+    ValueError if that one has ended or was for a different quantity.
+    """
+    if qty <= 0:
+        raise ValueError("Quantity must be positive.")
+    with transaction.atomic():
+        inv, _ = Inventory.objects.select_for_update().get_or_create(hub=hub, sku=sku)
+        if reference:
+            existing = Reservation.objects.filter(hub=hub, sku=sku, reference=reference).first()
+            if existing is not None:
+                return _replayed(existing, qty)
+        available = _available(inv)
+        if qty > available:
+            raise ValueError(f"Only {max(available, 0)} available.")
+        try:
+            with transaction.atomic():
+                reservation = Reservation.objects.create(
+                    hub=hub, sku=sku, qty=qty, user=user, reference=reference,
+                    expires_at=now() + timedelta(seconds=ttl or DEFAULT_TTL),
+                )
+        except IntegrityError:
+            return _replayed(Reservation.objects.get(hub=hub, sku=sku, reference=reference), qty)
+        Inventory.objects.filter(pk=inv.pk).update(reserved=F("reserved") + qty)
+        bump_hub_version(hub.id)
+    return reservation
+
+
+def _replayed(existing, qty):
+    """A repeated reserve() for a reference: the same ACTIVE hold, or ValueError."""
+    if existing.status != "ACTIVE":
+        raise ValueError(f"Reference {existing.reference!r} was already used by reservation #{existing.id} "
+                         f"({existing.status.lower()}).")
+    if existing.qty != qty:
+        raise ValueError(f"Reference {existing.reference!r} already holds {existing.qty}, not {qty}.")
+    return existing
+
+
+def _close(reservation, status):
+    """Lock an ACTIVE reservation and end it; returns the locked row (None if it had already ended)."""
+    reservation = Reservation.objects.select_for_update().get(pk=reservation.pk)
+    if reservation.status != "ACTIVE":
+        return None
+    reservation.status = status
+    reservation.closed_at = now()
+    reservation.save(update_fields=["status", "closed_at"])
+    Inventory.objects.filter(hub_id=reservation.hub_id, sku_id=reservation.sku_id).update(
+        reserved=F("reserved") - reservation.qty
+    )
+    bump_hub_version(reservation.hub_id)
+    return reservation
+
+
+@retry_on_db_lock
+def release(reservation):
+    """Give the held stock back to ATP. Returns False if the reservation had already ended."""
+    with transaction.atomic():
+        return _close(reservation, "RELEASED") is not None
+
+
+@retry_on_db_lock
+def consume(user, reservation, note=""):
+    """
+    Fulfil a reservation: the held units leave stock (logged as SALE) and the
+    hold ends, in one transaction. Raises ValueError if it has already ended.
+    """
+    with transaction.atomic():
+        closed = _close(reservation, "CONSUMED")
+        if closed is None:
+            raise ValueError(f"Reservation #{reservation.pk} is no longer active.")
+        services.adjust_stock(
+            user, closed.hub, closed.sku, -closed.qty, note=note or f"Reservation #{closed.id}",
+            reason="SALE", batch_id=closed.reference and f"order:{closed.reference}"[:64],
+        )
+    return closed
+
+
+def release_expired(batch=SWEEP_BATCH):
+    """
+    Expire ACTIVE holds past their expires_at, `batch` at a time (one short
+    transaction each, skipping rows another worker has locked). Returns the
+    number of reservations expired.
+    """
+    total = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                Reservation.objects.select_for_update(skip_locked=True)
+                .filter(status="ACTIVE", expires_at__lt=now())
+                .order_by("expires_at")
+                .values_list("id", "hub_id", "sku_id", "qty")[:batch]
+            )
+            if not rows:
+                return total
+            Reservation.objects.filter(id__in=[r[0] for r in rows]).update(status="EXPIRED", closed_at=now())
+            held = {}
+            for _, hub_id, sku_id, qty in rows:
+                held[(hub_id, sku_id)] = held.get((hub_id, sku_id), 0) + qty
+            release_by_pk = {
+                pk: held[(h, s)]
+                for pk, h, s in Inventory.objects.filter(
+                    hub_id__in={h for h, _ in held}, sku_id__in={s for _, s in held},
+                ).values_list("id", "hub_id", "sku_id")
+                if (h, s) in held
+            }
+            Inventory.objects.filter(pk__in=list(release_by_pk)).update(
+                reserved=F("reserved") - Case(
+                    *[When(pk=pk, then=Value(n)) for pk, n in release_by_pk.items()],
+                    default=Value(0), output_field=IntegerField(),
+                )
+            )
+            bump_hub_version(*{h for h, _ in held})
+        total += len(rows)
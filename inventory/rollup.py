@@ -0,0 +1,121 @@
+# inventory/rollup.py
+"""
+Incremental daily rollup of InventoryLog into DailyMovement.
+
+The watermark is the last log id folded in. Each run looks only at newer log
+rows, finds the (local day, hub) buckets they fall into — including old days,
+for late-arriving rows — and recomputes just those buckets from the raw log.
+Reports then read the small rollup table instead of grouping the whole log.
+"""
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from functools import reduce
+import operator
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Max, Min, Q, Sum, Value, When
+from django.db.models.functions import TruncDate
+from django.utils.timezone import make_aware
+
+from .db import settled_before
+from .models import DailyMovement, InventoryLog, RollupState
+
+ROLLUP_NAME = "daily_movement"
+# Log ids can commit out of order; the watermark stops below rows stamped after the
+# oldest open write transaction began (db.settled_before), less this for clock skew.
+SETTLE = timedelta(minutes=1)
+DAYS_PER_PASS = 31
+# Outbound that is customer demand. Transfers, stocktakes and manual/admin
+# write-downs move or correct stock without anyone buying it.
+DEMAND_REASONS = ("SALE", "SYNC")
+
+
+def _demand_q():
+    # Retail decrements were logged as ADJUST before the adjust page tagged them SALE;
+    # count those too, so a --full rebuild gets demand out of the existing log.
+    return Q(reason__in=DEMAND_REASONS) | Q(reason="ADJUST", user__role="RETAIL")
+
+
+def _receipt_q():
+    return Q(reason="RECEIPT")
+
+
+def _movement_sums():
+    zero = Value(0)
+    return {
+        "inbound_receipts": Sum(Case(When(Q(change__gt=0) & _receipt_q(), then="change"),
+                                     default=zero, output_field=IntegerField())),
+        "inbound_manual": Sum(Case(When(Q(change__gt=0) & ~_receipt_q(), then="change"),
+                                   default=zero, output_field=IntegerField())),
+        "outbound": Sum(Case(When(change__lt=0, then=-F("change")),
+                             default=zero, output_field=IntegerField())),
+        "outbound_demand": Sum(Case(When(Q(change__lt=0) & _demand_q(), then=-F("change")),
+                                    default=zero, output_field=IntegerField())),
+        "net": Sum("change"),
+    }
+
+
+def _day_range(day):
+    start = make_aware(datetime.combine(day, time.min))
+    return start, make_aware(datetime.combine(day + timedelta(days=1), time.min))
+
+
+def _rebuild_buckets(by_day):
+    """Recompute DailyMovement for {day: {hub_id, ...}} straight from the log."""
+    log_q, rollup_q = [], []
+    for day, hub_ids in by_day.items():
+        start, end = _day_range(day)
+        log_q.append(Q(created_at__gte=start, created_at__lt=end, hub_id__in=hub_ids))
+        rollup_q.append(Q(day=day, hub_id__in=hub_ids))
+
+    rows = (
+        InventoryLog.objects.filter(reduce(operator.or_, log_q))
+        .annotate(day=TruncDate("created_at"))
+        .values("day", "hub_id", "sku_id")
+        .annotate(**_movement_sums())
+        .order_by()
+    )
+    DailyMovement.objects.filter(reduce(operator.or_, rollup_q)).delete()
+    created = DailyMovement.objects.bulk_create(
+        [DailyMovement(**row) for row in rows],
+        batch_size=1000,
+    )
+    return len(created)
+
+
+def run_rollup(full=False):
+    """
+    Fold new log rows into DailyMovement. full=True clears the table and
+    rebuilds from the first log row. Returns (buckets recomputed, rows written).
+    """
+    with transaction.atomic():
+        state, _ = RollupState.objects.select_for_update().get_or_create(name=ROLLUP_NAME)
+        if full:
+            DailyMovement.objects.all().delete()
+            state.last_log_id = 0
+
+        new_logs = InventoryLog.objects.filter(id__gt=state.last_log_id)
+        by_day = defaultdict(set)
+        for day, hub_id in (
+            new_logs.annotate(day=TruncDate("created_at")).values_list("day", "hub_id").distinct().order_by()
+        ):
+            by_day[day].add(hub_id)
+
+        # Next watermark: just below the first unsettled row, else the newest row.
+        # Unsettled rows are folded in now and their buckets recomputed again next run.
+        bounds = new_logs.aggregate(
+            newest=Max("id"),
+            first_unsettled=Min("id", filter=Q(created_at__gt=settled_before(SETTLE))),
+        )
+
+        days = sorted(by_day)
+        written = 0
+        for i in range(0, len(days), DAYS_PER_PASS):
+            written += _rebuild_buckets({d: by_day[d] for d in days[i:i + DAYS_PER_PASS]})
+
+        if bounds["first_unsettled"] is not None:
+            state.last_log_id = bounds["first_unsettled"] - 1
+        elif bounds["newest"] is not None:
+            state.last_log_id = bounds["newest"]
+        state.save()
+    return sum(len(h) for h in by_day.values()), written
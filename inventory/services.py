@@ -1,9 +1,32 @@
 from django.db import transaction
-from .models import Inventory, InventoryLog
-def adjust_stock(user, hub, sku, delta, note=""):
+from .models import Inventory, InventoryLog, InventoryShard
+from . import sharding
+from .db import retry_on_db_lock
+@retry_on_db_lock
+def adjust_stock(user, hub, sku, delta, note="", reason="ADJUST", shipment=None, transfer_id="", batch_id="",
+                 check_available=False):
+    """
+    Apply a stock change and log it. ValueError if a decrement exceeds on-hand stock or,
+    with check_available (sales, transfers: anything leaving that isn't the reservation
+    itself), would dip into units held by reservations.
+    """
+    shards = sharding.shard_count(hub.id, sku.id)
+    if shards and not (check_available and delta < 0):  # hot SKU: no single-row lock (see inventory/sharding.py)
+        return sharding.adjust_sharded(user, hub, sku, delta, shards, note=note, reason=reason,
+                                       shipment=shipment, transfer_id=transfer_id, batch_id=batch_id)
     with transaction.atomic():
+        # The base-row lock also serializes against reservations.reserve().
         inv, _ = Inventory.objects.select_for_update().get_or_create(hub=hub, sku=sku)
         new_qty = inv.qty + delta
-        if new_qty < 0: raise ValueError("Insufficient stock")
+        floor = inv.reserved if check_available else 0
+        if delta < 0 and new_qty < floor:
+            # Shards (a hot SKU, or left after counter_shards was turned off and not compacted yet,
+            # or written by a worker with a stale shard_count) still hold stock: lock them (base
+            # first, as sharding._draw_across does) and count them; the base row may go negative.
+            shards = sum(InventoryShard.objects.select_for_update().filter(hub=hub, sku=sku).values_list("qty", flat=True))
+            if new_qty + shards < 0: raise ValueError("Insufficient stock")
+            if new_qty + shards < floor:
+                raise ValueError(f"Only {max(inv.qty + shards - inv.reserved, 0)} available ({inv.reserved} reserved)")
         inv.qty = new_qty; inv.save()
-        InventoryLog.objects.create(user=user, hub=hub, sku=sku, change=delta, note=note)
+        InventoryLog.objects.create(user=user, hub=hub, sku=sku, change=delta, note=note, reason=reason,
+                                    shipment=shipment, transfer_id=transfer_id, batch_id=batch_id)
@@ -0,0 +1,46 @@
+# inventory/shipments.py
+"""
+Creating shipments with all their lines at once (form or ASN CSV upload),
+and dispatching draft hub-to-hub transfers.
+"""
+from django.db import transaction
+
+from . import services
+from .db import retry_on_db_lock
+from .models import Shipment, ShipmentLine
+
+
+def create_shipment(supplier, hub, lines):
+    """Create a PENDING shipment and insert all its lines with one bulk insert."""
+    with transaction.atomic():
+        shipment = Shipment.objects.create(supplier=supplier, dest_hub=hub, status="PENDING")
+        ShipmentLine.objects.bulk_create([
+            ShipmentLine(shipment=shipment, sku_id=sku_id, qty=qty)
+            for sku_id, qty in lines.items()
+        ])
+    return shipment
+
+
+@retry_on_db_lock
+def dispatch_transfer(user, shipment):
+    """
+    Send a DRAFT transfer: its stock leaves the source hub (logged as TRANSFER)
+    and it becomes PENDING, to be received at the destination like any other
+    shipment. All or nothing; raises ValueError if the source is now short.
+    """
+    with transaction.atomic():
+        shipment = Shipment.objects.select_for_update().select_related("source_hub").get(pk=shipment.pk)
+        if shipment.status != "DRAFT" or shipment.source_hub is None:
+            raise ValueError(f"Shipment {shipment.id} is not a draft transfer.")
+        for line in shipment.lines.select_related("sku").order_by("sku_id"):
+            try:
+                services.adjust_stock(
+                    user, shipment.source_hub, line.sku, -line.qty, note=f"Shipment {shipment.id}",
+                    reason="TRANSFER", shipment=shipment, transfer_id=f"shipment-{shipment.id}",
+                    check_available=True,
+                )
+            except ValueError as e:
+                raise ValueError(f"Shipment {shipment.id}, {line.sku.sku}: {e}")
+        shipment.status = "PENDING"
+        shipment.save(update_fields=["status"])
+    return shipment
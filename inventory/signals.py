@@ -0,0 +1,58 @@
+# inventory/signals.py
+"""
+Model signal hooks, connected in InventoryConfig.ready().
+
+These cover single-row saves/deletes (views, admin, shell). Bulk paths
+(bulk_create / queryset.update) don't send signals and must bump versions
+themselves via inventory.cache (and record sync changes via inventory.sync).
+"""
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .cache import bump_catalog_version, bump_hub_version, invalidate_users
+from .models import SKU, Hub, HubSKU, Inventory, InventoryLog, User
+from .sharding import invalidate_shard_count
+from .sync import HUBSKU, INVENTORY, record_changes
+
+
+@receiver(post_save, sender=Inventory)
+@receiver(post_delete, sender=Inventory)
+@receiver(post_save, sender=HubSKU)
+@receiver(post_delete, sender=HubSKU)
+@receiver(post_save, sender=InventoryLog)
+def hub_data_changed(sender, instance, **kwargs):
+    bump_hub_version(instance.hub_id)
+
+
+@receiver(post_save, sender=Inventory)
+@receiver(post_delete, sender=Inventory)
+def inventory_synced(sender, instance, **kwargs):
+    record_changes(INVENTORY, instance.hub_id, [instance.sku_id])
+
+
+@receiver(post_save, sender=HubSKU)
+@receiver(post_delete, sender=HubSKU)
+def assignment_synced(sender, instance, **kwargs):
+    record_changes(HUBSKU, instance.hub_id, [instance.sku_id])
+    invalidate_shard_count(instance.hub_id, instance.sku_id)
+
+
+@receiver(post_save, sender=SKU)
+@receiver(post_delete, sender=SKU)
+@receiver(post_save, sender=Hub)
+@receiver(post_delete, sender=Hub)
+def catalog_changed(sender, instance, **kwargs):
+    bump_catalog_version()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    invalidate_users(instance.pk)
+
+
+@receiver(post_save, sender=Hub)
+@receiver(pre_delete, sender=Hub)  # pre: SET_NULL has already cleared user.hub by post_delete
+def hub_users_changed(sender, instance, **kwargs):
+    # cached users carry their hub; refresh everyone assigned to it
+    invalidate_users(*User.objects.filter(hub_id=instance.pk).values_list("pk", flat=True))
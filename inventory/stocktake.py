@@ -0,0 +1,142 @@
+# inventory/stocktake.py
+"""
+Cycle counts: open a session (freeze baseline), record counts, apply variances.
+
+Corrections take movements logged during the count into account: the target
+qty for a SKU is what was counted plus everything that moved after the
+baseline was frozen. All corrections are applied in one transaction with
+bulk writes.
+"""
+from django.db import transaction
+from django.db.models import Max, Sum
+from django.utils.timezone import now
+
+from .cache import bump_hub_version
+from .models import CountLine, CountSession, Inventory, InventoryLog
+from .sharding import compact
+from .sync import INVENTORY, record_changes
+
+
+def open_count(user, hub):
+    """Open a count session for a hub and freeze the current book quantities."""
+    with transaction.atomic():
+        compact(hub.id)  # baseline must include sharded stock
+        # Lock the hub's stock rows while reading the baseline and log watermark,
+        # so an in-flight adjust_stock is either fully before or fully after both.
+        stock = list(
+            Inventory.objects.select_for_update().filter(hub=hub).values_list("sku_id", "qty")
+        )
+        last_log = InventoryLog.objects.aggregate(m=Max("id"))["m"] or 0
+        session = CountSession.objects.create(hub=hub, opened_by=user, baseline_log_id=last_log)
+        CountLine.objects.bulk_create(
+            [CountLine(session=session, sku_id=sku_id, baseline_qty=qty) for sku_id, qty in stock],
+            batch_size=1000,
+        )
+    return session
+
+
+def record_counts(session, counts, add=False):
+    """
+    Store counted quantities ({sku_id: qty}) on an open session.
+    add=False replaces the count (CSV of totals); add=True accumulates
+    (scanner batches). SKUs missing from the baseline get a line with baseline 0.
+    """
+    if session.status != "OPEN":
+        raise ValueError(f"Count #{session.id} is {session.status.lower()}.")
+    with transaction.atomic():
+        lines = {
+            line.sku_id: line
+            for line in CountLine.objects.select_for_update().filter(session=session, sku_id__in=list(counts))
+        }
+        to_update, to_create = [], []
+        for sku_id, qty in counts.items():
+            line = lines.get(sku_id)
+            if line is None:
+                to_create.append(CountLine(session=session, sku_id=sku_id, baseline_qty=0, counted_qty=qty))
+                continue
+            line.counted_qty = (line.counted_qty or 0) + qty if add else qty
+            to_update.append(line)
+        CountLine.objects.bulk_update(to_update, ["counted_qty"], batch_size=1000)
+        CountLine.objects.bulk_create(to_create, batch_size=1000)
+    return len(to_update) + len(to_create)
+
+
+def compute_variances(session, zero_uncounted=False):
+    """
+    Variance rows for a session, computed set-wise (three queries, no per-SKU work):
+      variance = counted - baseline          (what the count found)
+      moved    = logged changes since baseline
+      delta    = counted + moved - current   (correction to apply now)
+    Uncounted SKUs are skipped unless zero_uncounted (full-hub count).
+    """
+    lines = CountLine.objects.filter(session=session).select_related("sku").order_by("sku__sku")
+    if not zero_uncounted:
+        lines = lines.filter(counted_qty__isnull=False)
+    moved = dict(
+        InventoryLog.objects
+        .filter(hub_id=session.hub_id, id__gt=session.baseline_log_id)
+        .values_list("sku_id")
+        .annotate(total=Sum("change"))
+    )
+    # On hand including shard rows: apply_count folds them into qty before it writes.
+    current = dict(Inventory.objects.filter(hub_id=session.hub_id).with_on_hand().values_list("sku_id", "on_hand"))
+
+    rows = []
+    for line in lines:
+        counted = line.counted_qty if line.counted_qty is not None else 0
+        line_moved = moved.get(line.sku_id, 0)
+        target = max(counted + line_moved, 0)
+        rows.append({
+            "sku_id": line.sku_id,
+            "sku": line.sku,
+            "baseline": line.baseline_qty,
+            "counted": line.counted_qty,
+            "variance": counted - line.baseline_qty,
+            "moved": line_moved,
+            "current": current.get(line.sku_id, 0),
+            "target": target,
+            "delta": target - current.get(line.sku_id, 0),
+        })
+    return rows
+
+
+def apply_count(user, session, zero_uncounted=False):
+    """
+    Apply all corrections in one transaction: bulk update/insert Inventory rows
+    and bulk insert the InventoryLog entries. Returns the number of SKUs changed.
+    """
+    with transaction.atomic():
+        session = CountSession.objects.select_for_update().get(pk=session.pk)
+        if session.status != "OPEN":
+            raise ValueError(f"Count #{session.id} is {session.status.lower()}.")
+
+        compact(session.hub_id)  # corrections are written to Inventory.qty
+        # Lock stock first so `current` can't move between computing and writing.
+        stock = {
+            inv.sku_id: inv
+            for inv in Inventory.objects.select_for_update().filter(hub_id=session.hub_id)
+        }
+        changes = [r for r in compute_variances(session, zero_uncounted) if r["delta"]]
+
+        to_update, to_create, logs = [], [], []
+        note = f"Stocktake #{session.id}"
+        for r in changes:
+            inv = stock.get(r["sku_id"])
+            if inv is None:
+                to_create.append(Inventory(hub_id=session.hub_id, sku_id=r["sku_id"], qty=r["target"]))
+            else:
+                inv.qty = r["target"]
+                to_update.append(inv)
+            logs.append(InventoryLog(user=user, hub_id=session.hub_id, sku_id=r["sku_id"],
+                                     change=r["delta"], note=note, reason="STOCKTAKE",
+                                     batch_id=f"stocktake-{session.id}"))
+        Inventory.objects.bulk_update(to_update, ["qty"], batch_size=1000)
+        Inventory.objects.bulk_create(to_create, batch_size=1000)
+        InventoryLog.objects.bulk_create(logs, batch_size=1000)
+
+        session.status = "APPLIED"
+        session.applied_at = now()
+        session.save(update_fields=["status", "applied_at"])
+        record_changes(INVENTORY, session.hub_id, [r["sku_id"] for r in changes])
+        bump_hub_version(session.hub_id)
+    return len(changes)
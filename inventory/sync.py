@@ -0,0 +1,176 @@
+# inventory/sync.py
+"""
+Delta sync for offline handhelds.
+
+Every Inventory / HubSKU change appends a SyncChange row (single saves via
+inventory.signals, bulk paths via record_changes). A device keeps the last
+token it saw and pulls only newer changes for its hub, so reconnecting costs
+O(changes), not O(catalog). Tokens are "<epoch>-<change id>" (see SyncEpoch):
+a token from another epoch, below the pruned feed or above its newest id
+gets a full snapshot instead. Offline adjustments are pushed with a
+per-device idempotency key; a retried push returns the stored result instead
+of applying twice.
+"""
+import secrets
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Max, Min
+from django.utils.timezone import now
+
+from . import services
+from .db import retry_on_db_lock, settled_before
+from .events import notify
+from .models import HubSKU, Inventory, SyncChange, SyncEpoch, SyncPush
+
+INVENTORY = "INVENTORY"
+HUBSKU = "HUBSKU"
+
+# Ids are assigned at insert but become visible at commit, so a slow writer can
+# commit id N after a reader has already seen N+1. Pulls therefore stop at the
+# first change stamped after the oldest still-open write transaction began (see
+# db.settled_before); this window on top covers clock skew between app servers and the DB.
+SETTLE_SECONDS = getattr(settings, "SYNC_SETTLE_SECONDS", 2)
+PULL_LIMIT = getattr(settings, "SYNC_PULL_LIMIT", 1000)
+
+
+def record_changes(kind, hub_id, sku_ids):
+    """Append change rows for bulk writes (single saves are covered by signals)."""
+    SyncChange.objects.bulk_create(
+        [SyncChange(kind=kind, hub_id=hub_id, sku_id=sku_id) for sku_id in sku_ids],
+        batch_size=1000,
+    )
+    transaction.on_commit(notify)  # live dashboards (inventory.events)
+
+
+def _snapshot(hub_id, inv_filter=None, link_filter=None):
+    inv_qs = Inventory.objects.filter(hub_id=hub_id)
+    link_qs = HubSKU.objects.filter(hub_id=hub_id)
+    if inv_filter is not None:
+        inv_qs = inv_qs.filter(sku_id__in=inv_filter)
+        link_qs = link_qs.filter(sku_id__in=link_filter)
+    inventory = [
+        {"sku_id": sku_id, "sku": code, "qty": qty}
+        for sku_id, code, qty in inv_qs.with_on_hand().values_list("sku_id", "sku__sku", "on_hand")
+    ]
+    assignments = [
+        {"sku_id": sku_id, "sku": code, "active": active, "reorder_point": reorder_point}
+        for sku_id, code, active, reorder_point
+        in link_qs.values_list("sku_id", "sku__sku", "active", "reorder_point")
+    ]
+    return inventory, assignments
+
+
+def current_epoch():
+    """This database's feed epoch (started on first use)."""
+    return SyncEpoch.objects.order_by("-id").values_list("value", flat=True).first() or new_epoch()
+
+
+def new_epoch():
+    """Start a new feed epoch: every token issued so far gets a full snapshot on its next pull."""
+    return SyncEpoch.objects.create(value=secrets.token_hex(4)).value
+
+
+def parse_token(token):
+    """'<epoch>-<id>' → (epoch, id); empty → (None, 0). Bare ids (older clients) have no epoch. ValueError if malformed."""
+    if not token:
+        return None, 0
+    epoch, _, change_id = str(token).rpartition("-")
+    return epoch or None, int(change_id)
+
+
+def pull_changes(hub_id, since="", limit=PULL_LIMIT):
+    """
+    Changes for a hub after token `since`, as current state:
+      {"token", "reset", "more", "inventory", "assignments",
+       "deleted_inventory", "deleted_assignments"}
+    No token, or a stale one (other epoch, older than the pruned feed, newer
+    than the feed, or the feed is empty), returns a full snapshot with
+    reset=True; the device should replace its local copy. ValueError if the
+    token is malformed.
+    """
+    token_epoch, since = parse_token(since)
+    epoch = current_epoch()
+    cutoff = settled_before(timedelta(seconds=SETTLE_SECONDS))
+    feed = SyncChange.objects.aggregate(oldest=Min("id"), newest=Max("id"))
+
+    if (
+        not since
+        or token_epoch != epoch
+        or feed["oldest"] is None
+        or since < feed["oldest"] - 1
+        or since > feed["newest"]
+    ):
+        # Token first, snapshot second: anything after the token is re-sent, never lost.
+        token = SyncChange.objects.filter(created_at__lte=cutoff).aggregate(m=Max("id"))["m"] or 0
+        inventory, assignments = _snapshot(hub_id)
+        return {
+            "token": f"{epoch}-{token}", "reset": True, "more": False,
+            "inventory": inventory, "assignments": assignments,
+            "deleted_inventory": [], "deleted_assignments": [],
+        }
+
+    rows = list(
+        SyncChange.objects.filter(hub_id=hub_id, id__gt=since)
+        .order_by("id")
+        .values_list("id", "kind", "sku_id", "created_at")[:limit]
+    )
+    more = len(rows) == limit
+    # Stop at the first unsettled change (not skip it) so the token never jumps a gap.
+    settled = []
+    for row in rows:
+        if row[3] > cutoff:
+            more = False
+            break
+        settled.append(row)
+
+    inv_ids = {sku_id for _, kind, sku_id, _ in settled if kind == INVENTORY}
+    link_ids = {sku_id for _, kind, sku_id, _ in settled if kind == HUBSKU}
+    inventory, assignments = _snapshot(hub_id, inv_ids, link_ids)
+    return {
+        "token": f"{epoch}-{settled[-1][0] if settled else since}",
+        "reset": False,
+        "more": more,
+        "inventory": inventory,
+        "assignments": assignments,
+        "deleted_inventory": sorted(inv_ids - {r["sku_id"] for r in inventory}),
+        "deleted_assignments": sorted(link_ids - {r["sku_id"] for r in assignments}),
+    }
+
+
+@retry_on_db_lock
+def apply_push(user, device_id, hub, sku, delta, key, note=""):
+    """
+    Apply one queued offline adjustment exactly once per (device_id, key).
+    Returns (SyncPush, duplicate). Rejections (e.g. insufficient stock) are
+    recorded too, so a retry gets the same answer.
+    """
+    with transaction.atomic():
+        try:
+            with transaction.atomic():
+                push = SyncPush.objects.create(
+                    user=user, device_id=device_id, key=key, hub=hub, sku=sku, delta=delta,
+                )
+        except IntegrityError:
+            return SyncPush.objects.get(device_id=device_id, key=key), True
+        try:
+            services.adjust_stock(user, hub, sku, delta, note=note or f"Offline sync ({device_id})",
+                                  reason="SYNC", batch_id=f"{device_id}:{key}"[:64], check_available=True)
+        except ValueError as e:
+            push.status = "REJECTED"
+            push.error = str(e)
+            push.save(update_fields=["status", "error"])
+    return push, False
+
+
+def prune(days=30):
+    """
+    Drop feed rows and push receipts older than `days`; devices behind that get
+    a reset. The newest change is always kept, so up-to-date tokens stay valid.
+    """
+    cutoff = now() - timedelta(days=days)
+    newest = SyncChange.objects.aggregate(m=Max("id"))["m"] or 0
+    changes, _ = SyncChange.objects.filter(created_at__lt=cutoff, id__lt=newest).delete()
+    pushes, _ = SyncPush.objects.filter(created_at__lt=cutoff).delete()
+    return changes, pushes
@@ -0,0 +1,129 @@
+"""
+Stock writes under concurrency: adjust_stock (plain and sharded), receive_shipment
+and the stress commands, run from real threads against the test database.
+
+TransactionTestCase, because each thread opens its own connection and must see
+committed rows; on SQLite the test database is a file (see DATABASES TEST in
+settings) so the threads queue on the write lock as they do in production.
+"""
+import threading
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Sum
+from django.test import TransactionTestCase, override_settings
+
+from inventory.models import SKU, Hub, HubSKU, Inventory, InventoryLog, Receipt, User
+from inventory.receiving import receive_shipment
+from inventory.services import adjust_stock
+from inventory.shipments import create_shipment
+
+THREADS = 8
+
+
+def run_threads(target, n=THREADS):
+    """Run target(i) in n threads released together; returns their results, re-raises the first error."""
+    start = threading.Barrier(n)
+    results, errors = [None] * n, []
+
+    def run(i):
+        try:
+            start.wait()
+            results[i] = target(i)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    if errors:
+        raise errors[0]
+    return results
+
+
+# Per-process cache: these tests must not write versions into the dev cache directory.
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class ConcurrentStockTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.hub = Hub.objects.create(name="Stress hub")
+        self.sku = SKU.objects.create(sku="STRESS-1", name="Stress SKU")
+        self.user = User.objects.create_user("stress", role="ADMIN")
+
+    def on_hand(self):
+        return Inventory.objects.filter(hub=self.hub, sku=self.sku).with_on_hand().get().on_hand
+
+    def logged(self, **filters):
+        return InventoryLog.objects.filter(hub=self.hub, sku=self.sku, **filters).aggregate(s=Sum("change"))["s"] or 0
+
+    def adjust_pairs(self, pairs=25):
+        def work(i):
+            for _ in range(pairs):
+                adjust_stock(self.user, self.hub, self.sku, 2, note="stress")
+                adjust_stock(self.user, self.hub, self.sku, -1, note="stress")
+        run_threads(work)
+        self.assertEqual(self.on_hand(), THREADS * pairs)
+        self.assertEqual(self.logged(), THREADS * pairs)
+        self.assertEqual(InventoryLog.objects.filter(hub=self.hub, sku=self.sku).count(), THREADS * pairs * 2)
+
+    def test_concurrent_adjustments_lose_no_updates(self):
+        self.adjust_pairs()
+
+    def test_sharded_adjustments_lose_no_updates(self):
+        HubSKU.objects.create(hub=self.hub, sku=self.sku, counter_shards=4)
+        self.adjust_pairs()
+
+    def test_concurrent_decrements_never_go_negative(self):
+        adjust_stock(self.user, self.hub, self.sku, 50)
+
+        def work(i):
+            taken = 0
+            for _ in range(10):
+                try:
+                    adjust_stock(self.user, self.hub, self.sku, -1)
+                    taken += 1
+                except ValueError:
+                    pass
+            return taken
+
+        self.assertEqual(sum(run_threads(work)), 50)
+        self.assertEqual(self.on_hand(), 0)
+        self.assertEqual(self.logged(), 0)
+
+    def test_concurrent_receive_applies_shipment_once(self):
+        other = SKU.objects.create(sku="STRESS-2", name="Other SKU")
+        shipment = create_shipment(self.user, self.hub, {self.sku.id: 7, other.id: 3})
+
+        receipts = run_threads(lambda i: receive_shipment(self.user, shipment))
+
+        self.assertEqual(sum(r is not None for r in receipts), 1)
+        self.assertEqual(Receipt.objects.filter(shipment=shipment).count(), 1)
+        shipment.refresh_from_db()
+        self.assertEqual(shipment.status, "RECEIVED")
+        self.assertEqual(self.on_hand(), 7)
+        self.assertEqual(self.logged(reason="RECEIPT", shipment=shipment), 7)
+        self.assertEqual(
+            InventoryLog.objects.filter(shipment=shipment, reason="RECEIPT").aggregate(s=Sum("change"))["s"], 10
+        )
+
+    def test_stress_writes_invariants_hold(self):
+        for code in ("STRESS-2", "STRESS-3"):
+            SKU.objects.create(sku=code, name=code)
+        out = StringIO()
+        # Raises CommandError on any invariant violation (ledger, negatives, double receipts).
+        call_command("stress_writes", workers=4, ops=40, skus=3, shipments=3, seed=1, username="stress", stdout=out)
+        self.assertIn("Invariants hold", out.getvalue())
+        self.assertNotIn("failed", out.getvalue())
+
+    def test_stress_stock_reports_throughput(self):
+        out = StringIO()
+        call_command("stress_stock", hub=self.hub.name, sku=self.sku.sku, threads=4, ops=40, shards=2,
+                     username="stress", stdout=out)
+        self.assertIn("ops/s", out.getvalue())
+        self.assertEqual(self.on_hand(), 4 * 20)
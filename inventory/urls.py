@@ -6,6 +6,10 @@ from .views import (
     logout_get,
 )
 from . import views_skus  # NEW
+from . import views_api
+from . import views_stocktake
+from . import views_events
+from . import views_reports
 
 urlpatterns = [
     # Health & auth
@@ -18,19 +22,42 @@ urlpatterns = [
     # Inventory
     path("inventory/", inventory_list, name="inventory_list"),
     path("inventory/<int:hub_id>/<int:sku_id>/adjust/", inventory_adjust, name="inventory_adjust"),
+    path("inventory/events/", views_events.stock_events, name="stock_events"),
 
     # Logs
     path("logs/", logs_list, name="logs_list"),
     path("logs/export.csv", logs_export_csv, name="logs_export_csv"),
 
+    # Reports
+    path("reports/movements/", views_reports.movement_report, name="movement_report"),
+
     # Shipments
     path("shipments/", shipments_list, name="shipments_list"),
     path("shipments/new/", shipment_new, name="shipment_new"),
     path("shipments/<int:shipment_id>/receive/", shipment_receive, name="shipment_receive"),
 
+    # Stocktakes (cycle counts)
+    path("stocktakes/", views_stocktake.stocktake_list, name="stocktake_list"),
+    path("stocktakes/<int:session_id>/", views_stocktake.stocktake_detail, name="stocktake_detail"),
+    path("stocktakes/<int:session_id>/apply/", views_stocktake.stocktake_apply, name="stocktake_apply"),
+
     # ---- NEW: SKU admin UI ----
     path("skus/upload/", views_skus.skus_upload, name="skus_upload"),
     path("skus/by-hub/", views_skus.skus_by_hub, name="skus_by_hub"),
     path("skus/by-hub/<int:hub_id>/", views_skus.skus_by_hub, name="skus_by_hub_detail"),
     path("skus/<int:sku_id>/assign/", views_skus.sku_assign, name="sku_assign"),
+    path("skus/matrix/", views_skus.sku_matrix, name="sku_matrix"),
+
+    # JSON API
+    path("api/hub-skus/", views_api.api_hub_skus, name="api_hub_skus"),
+    path("api/stocktakes/<int:session_id>/scans/", views_api.api_stocktake_scans, name="api_stocktake_scans"),
+    path("api/availability/", views_api.api_availability, name="api_availability"),
+    path("api/reservations/", views_api.api_reserve, name="api_reserve"),
+    path("api/reservations/<int:reservation_id>/release/", views_api.api_reservation_release,
+         name="api_reservation_release"),
+    path("api/reservations/<int:reservation_id>/consume/", views_api.api_reservation_consume,
+         name="api_reservation_consume"),
+    path("api/receipts/open/", views_api.api_open_receipts, name="api_open_receipts"),
+    path("api/sync/pull/", views_api.api_sync_pull, name="api_sync_pull"),
+    path("api/sync/push/", views_api.api_sync_push, name="api_sync_push"),
 ]
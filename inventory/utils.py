@@ -1,5 +1,11 @@
 # inventory/utils.py
-from .models import Hub
+import csv
+import io
+
+from django.core.cache import cache
+
+from .cache import cache_is_shared, catalog_version
+from .models import Hub, SKU
 
 def get_visible_hubs(user):
     """
@@ -13,3 +19,98 @@ def get_visible_hubs(user):
         return Hub.objects.filter(id=user.hub_id)
     # Fallback: no hub assigned → see none
     return Hub.objects.none()
+
+
+SKU_LOOKUP_KEY = "inv:sku-lookup:{}"
+
+
+def build_sku_lookup():
+    """
+    {code or barcode: sku_id} for resolving scanned/typed SKUs.
+    SKU codes win over barcodes; a barcode shared by several SKUs maps to None
+    (ambiguous) so callers can report it instead of guessing.
+    Cached per catalog version (any SKU change starts a new one) when the cache is
+    shared; a per-process cache would miss SKU changes made by other workers, so
+    then it is one query per call.
+    """
+    if not cache_is_shared():
+        return _load_sku_lookup()
+    key = SKU_LOOKUP_KEY.format(catalog_version())
+    lookup = cache.get(key)
+    if lookup is None:
+        lookup = _load_sku_lookup()
+        cache.set(key, lookup, 24 * 60 * 60)
+    return lookup
+
+
+def _load_sku_lookup():
+    lookup = {}
+    codes = {}
+    for sku_id, code, barcode in SKU.objects.values_list("id", "sku", "barcode"):
+        codes[code] = sku_id
+        barcode = (barcode or "").strip()
+        if barcode:
+            lookup[barcode] = None if barcode in lookup and lookup[barcode] != sku_id else sku_id
+    lookup.update(codes)
+    return lookup
+
+
+SKU_CODE_COLUMNS = ("sku", "code", "barcode")
+SKU_QTY_COLUMNS = ("qty", "quantity")
+
+
+def read_sku_qty_csv(f):
+    """
+    Read a sku,qty CSV upload (ASN files, stocktake counts).
+    Headers (case-insensitive): sku (or code/barcode), qty (or quantity).
+    Returns [(line_no, code, qty_raw), ...] and a list of file-level errors.
+    """
+    data = f.read()
+    if isinstance(data, bytes):
+        data = data.decode("utf-8-sig", errors="ignore")
+    reader = csv.DictReader(io.StringIO(data))
+    reader.fieldnames = [h.lower().strip() for h in (reader.fieldnames or [])]
+
+    code_col = next((c for c in SKU_CODE_COLUMNS if c in reader.fieldnames), None)
+    qty_col = next((c for c in SKU_QTY_COLUMNS if c in reader.fieldnames), None)
+    if not code_col or not qty_col:
+        return [], ["CSV needs a sku (or barcode) column and a qty column."]
+
+    rows = [
+        (idx, (row.get(code_col) or "").strip(), (row.get(qty_col) or "").strip())
+        for idx, row in enumerate(reader, start=2)  # start=2 => header is row 1
+    ]
+    return rows, []
+
+
+def resolve_sku_qty_rows(rows, sku_lookup, min_qty=1):
+    """
+    Validate (line_no, code, qty) rows against a preloaded SKU lookup
+    (build_sku_lookup). Duplicate SKUs are merged into one line.
+    Returns ({sku_id: qty}, {line_no: error message}).
+    """
+    lines = {}
+    errors = {}
+    for line_no, code, qty_raw in rows:
+        if not code and not str(qty_raw).strip():
+            continue  # blank row
+        if not code:
+            errors[line_no] = "SKU is missing."
+            continue
+        if code not in sku_lookup:
+            errors[line_no] = f"Unknown SKU or barcode '{code}'."
+            continue
+        sku_id = sku_lookup[code]
+        if sku_id is None:
+            errors[line_no] = f"Barcode '{code}' matches more than one SKU; use the SKU code."
+            continue
+        try:
+            qty = int(qty_raw)
+        except (TypeError, ValueError):
+            errors[line_no] = f"Quantity '{qty_raw}' is not a whole number."
+            continue
+        if qty < min_qty:
+            errors[line_no] = f"Quantity must be at least {min_qty}."
+            continue
+        lines[sku_id] = lines.get(sku_id, 0) + qty
+    return lines, errors
@@ -1,26 +1,34 @@
 # inventory/views.py
 
+from django.conf import settings
 from django.contrib.auth import logout
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.core.exceptions import PermissionDenied
-from django.http import HttpResponse
+from django.http import HttpResponse, JsonResponse
 from django.shortcuts import render, redirect, get_object_or_404
 
+from django.utils.functional import SimpleLazyObject
 from django.utils.timezone import now
-from django.db.models import Sum, Count
+from django.db.models import Sum, Count, OuterRef, Q, Subquery
+from django.utils.dateparse import parse_datetime
 
 import csv
 import math
 
 from .models import (
     Inventory, InventoryLog, Hub, SKU,
-    Shipment, ShipmentLine,
+    Shipment, ShipmentLine, User,
 )
 from .services import adjust_stock
-from .utils import get_visible_hubs          # make sure inventory/utils.py exists
-from .receiving import receive_shipment      # make sure inventory/receiving.py exists
-from .forms import AdjustStockForm           # make sure inventory/forms.py exists
+from .cache import scope_key
+from .utils import (                         # make sure inventory/utils.py exists
+    get_visible_hubs, build_sku_lookup, read_sku_qty_csv, resolve_sku_qty_rows,
+)
+from .receiving import OPEN_STATUSES, receive_shipment  # make sure inventory/receiving.py exists
+from .shipments import create_shipment
+from . import warmup
+from .forms import AdjustStockForm, ShipmentCreateForm, ShipmentLineFormSet
 
 
 # ------------------------
@@ -54,6 +62,21 @@ def healthcheck(request):
     return HttpResponse("ok")
 
 
+def readyz(request):
+    """
+    Ready only once this worker has warmed up (inventory/warmup.py); healthz just says the process is up.
+    Without the gunicorn hook (runserver), the first probe starts the warm-up in the background;
+    probes answer 503 until it is done.
+    """
+    ready = warmup.state["ready"]
+    if not ready:
+        warmup.start()
+    return JsonResponse(
+        {"ready": ready, "timings": warmup.state["timings"], "errors": warmup.state["errors"]},
+        status=200 if ready else 503,
+    )
+
+
 def logout_get(request):
     """Allow logging out via GET, then redirect to login."""
     logout(request)
@@ -107,38 +130,18 @@ def home(request):
     rotating_quote = quotes[day_index % len(quotes)]
 
     # --- Scoped inventory queryset (only hubs the user can see; admin sees all) ---
-    inv_qs = Inventory.objects.select_related("hub", "sku")
+    inv_qs = Inventory.objects.select_related("hub", "sku").with_on_hand()
     if not user.is_superuser:
         if visible_hubs.exists():
             inv_qs = inv_qs.filter(hub__in=visible_hubs)
         else:
             inv_qs = inv_qs.none()
 
-    # --- Quick stats ---
-    # SKUs assigned (distinct by SKU across scope)
-    total_skus = inv_qs.values("sku").distinct().count()
-
-    # Total stock on hand (sum of qty across scope)
-    total_qty = inv_qs.aggregate(total=Sum("qty"))["total"] or 0
-
-    # Low stock alerts (aggregate by SKU across scope)
+    # --- Quick stats + recent actions ---
+    # Evaluated lazily: the template only touches them when its cached
+    # fragment for this scope/version is missing.
     LOW_STOCK_THRESHOLD = 10
-    low_stock_rows = (
-        inv_qs.values("sku__sku")
-             .annotate(total=Sum("qty"))
-             .filter(total__lt=LOW_STOCK_THRESHOLD)
-             .order_by("total")[:10]
-    )
-    low_stock = [{"sku": r["sku__sku"], "qty": r["total"] or 0} for r in low_stock_rows]
-
-    # --- Recent actions (always show last 3 in scope) ---
-    logs_qs = InventoryLog.objects.select_related("user", "hub", "sku").order_by("-created_at")
-    if not user.is_superuser:
-        if visible_hubs.exists():
-            logs_qs = logs_qs.filter(hub__in=visible_hubs)
-        else:
-            logs_qs = logs_qs.none()
-    recent_logs = list(logs_qs[:3])
+    stats = SimpleLazyObject(lambda: _home_stats(inv_qs, visible_hubs, user, LOW_STOCK_THRESHOLD))
 
     # --- Friendly welcome line ---
     welcome = f"Welcome {user.username.capitalize()}! {emojis['socks']}  "
@@ -148,7 +151,7 @@ def home(request):
         welcome += "You don’t have a hub assigned yet."
 
     # --- A short recent inventory peek (global scope teaser – keep for consistency) ---
-    recent_inventory = inv_qs.order_by("-id")[:10]
+    recent_inventory = inv_qs.order_by("-id")[:10]  # lazy, only hit on a cache miss
 
     ctx = {
         # greeting block
@@ -158,19 +161,15 @@ def home(request):
         "emojis": emojis,
 
         # stats
-        "total_skus": total_skus,
-        "total_qty": total_qty,
-        "low_stock": low_stock,
+        "stats": stats,
         "low_stock_threshold": LOW_STOCK_THRESHOLD,
+        "cache_scope": scope_key(visible_hubs.values_list("id", flat=True)),
 
         # encouragement / context
         "today": today,
         "friendly_msg": friendly_msg,
         "rotating_quote": rotating_quote,
 
-        # recent activity
-        "recent_logs": recent_logs,
-
         # existing fields for the rest of the page
         "user": user,
         "hubs": visible_hubs,
@@ -179,6 +178,39 @@ def home(request):
     return render(request, "home.html", ctx)
 
 
+def _home_stats(inv_qs, visible_hubs, user, low_stock_threshold):
+    # SKUs assigned (distinct by SKU across scope)
+    total_skus = inv_qs.values("sku").distinct().count()
+
+    # Total stock on hand (sum of qty across scope)
+    total_qty = inv_qs.aggregate(total=Sum("on_hand"))["total"] or 0
+
+    # Low stock alerts (aggregate by SKU across scope)
+    low_stock_rows = (
+        inv_qs.values("sku__sku")
+             .annotate(total=Sum("on_hand"))
+             .filter(total__lt=low_stock_threshold)
+             .order_by("total")[:10]
+    )
+    low_stock = [{"sku": r["sku__sku"], "qty": r["total"] or 0} for r in low_stock_rows]
+
+    # Recent actions (always show last 3 in scope)
+    logs_qs = InventoryLog.objects.select_related("user", "hub", "sku").order_by("-created_at")
+    if not user.is_superuser:
+        if visible_hubs.exists():
+            logs_qs = logs_qs.filter(hub__in=visible_hubs)
+        else:
+            logs_qs = logs_qs.none()
+    recent_logs = list(logs_qs[:3])
+
+    return {
+        "total_skus": total_skus,
+        "total_qty": total_qty,
+        "low_stock": low_stock,
+        "recent_logs": recent_logs,
+    }
+
+
 # ------------------------
 # Inventory: list & adjust
 # ------------------------
@@ -194,12 +226,16 @@ def inventory_list(request):
         Inventory.objects
         .select_related("hub", "sku")
         .filter(hub__in=visible_hubs)
+        .with_available()
         .order_by("hub__name", "sku__sku")
     )
     scope = "All hubs (admin)" if request.user.is_superuser else (
         ", ".join(visible_hubs.values_list("name", flat=True)) or "No hub assigned"
     )
-    return render(request, "inventory_list.html", {"rows": rows, "scope": scope})
+    cache_scope = scope_key(visible_hubs.values_list("id", flat=True))
+    return render(request, "inventory_list.html", {
+        "rows": rows, "scope": scope, "cache_scope": cache_scope, "live_events": settings.LIVE_EVENTS,
+    })
 
 
 @login_required
@@ -220,8 +256,12 @@ def inventory_adjust(request, hub_id, sku_id):
         if form.is_valid():
             delta = form.cleaned_data["delta"]
             note = form.cleaned_data.get("note") or ""
+            # Retail decrements are sales: logged as such (rebalancing demand), and they
+            # may not take units held by reservations.
+            sale = getattr(request.user, "role", "") == "RETAIL" and delta < 0
             try:
-                adjust_stock(request.user, hub, sku, delta, note=note)
+                adjust_stock(request.user, hub, sku, delta, note=note,
+                             reason="SALE" if sale else "ADJUST", check_available=sale)
                 messages.success(request, f"Adjusted {sku.sku} at {hub.name} by {delta}.")
             except ValueError as e:
                 messages.error(request, str(e))
@@ -236,14 +276,31 @@ def inventory_adjust(request, hub_id, sku_id):
 # Logs: list & CSV export
 # ------------------------
 
+def _filtered_logs(request):
+    """
+    Log queryset narrowed by the structured, indexed fields:
+    ?reason=RECEIPT&shipment=123&batch=stocktake-7&transfer=<id>
+    """
+    logs = InventoryLog.objects.select_related("user", "hub", "sku").order_by("-created_at")
+    if request.GET.get("reason"):
+        logs = logs.filter(reason=request.GET["reason"])
+    if request.GET.get("shipment", "").isdigit():
+        logs = logs.filter(shipment_id=request.GET["shipment"])
+    if request.GET.get("batch"):
+        logs = logs.filter(batch_id=request.GET["batch"])
+    if request.GET.get("transfer"):
+        logs = logs.filter(transfer_id=request.GET["transfer"])
+    return logs
+
+
 @login_required
 def logs_list(request):
-    logs = (
-        InventoryLog.objects
-        .select_related("user", "hub", "sku")
-        .order_by("-created_at")
-    )[:200]
-    return render(request, "logs_list.html", {"logs": logs})
+    logs = _filtered_logs(request)[:200]
+    return render(request, "logs_list.html", {
+        "logs": logs,
+        "reasons": InventoryLog.REASON_CHOICES,
+        "filters": request.GET,
+    })
 
 
 @login_required
@@ -252,14 +309,18 @@ def logs_export_csv(request):
     filename = f"inventory_logs_{now().date()}.csv"
     response["Content-Disposition"] = f'attachment; filename="{filename}"'
     w = csv.writer(response)
-    w.writerow(["created_at", "user", "hub", "sku", "change", "note"])
-    for log in InventoryLog.objects.select_related("user", "hub", "sku").order_by("-created_at"):
+    w.writerow(["created_at", "user", "hub", "sku", "change", "reason", "shipment", "transfer_id", "batch_id", "note"])
+    for log in _filtered_logs(request):
         w.writerow([
             log.created_at,
             getattr(log.user, "username", ""),
             log.hub.name,
             log.sku.sku,
             log.change,
+            log.reason,
+            log.shipment_id or "",
+            log.transfer_id,
+            log.batch_id,
             log.note
         ])
     return response
@@ -269,38 +330,101 @@ def logs_export_csv(request):
 # Shipments: list / new / receive
 # ------------------------
 
+SHIPMENTS_PAGE = 50
+
+
 @login_required
 def shipments_list(request):
     """
     Superusers: see all shipments.
-    Hub managers: see shipments for their hub only.
+    Hub managers: see shipments for their hub only (suppliers: also their own).
+    Filters: ?status=DRAFT|PENDING|PARTIAL|RECEIVED|OPEN&hub=<id>&supplier=<id>. Keyset paging on
+    (created_at, id) via ?after=<created_at>|<id>, so deep pages cost the
+    same as the first; line count and units come from the same query.
     """
     visible_hubs = get_visible_hubs(request.user)
-    qs = Shipment.objects.select_related("dest_hub", "supplier").order_by("-created_at")
+    qs = (
+        Shipment.objects.select_related("dest_hub", "source_hub", "supplier")
+        .annotate(n_lines=Count("lines"), units=Sum("lines__qty"), received=Sum("lines__received_qty"))
+        .order_by("-created_at", "-id")
+    )
     if not request.user.is_superuser:
-        qs = qs.filter(dest_hub__in=visible_hubs)
-    ships = qs[:100]
-    return render(request, "shipments_list.html", {"ships": ships})
+        qs = qs.filter(Q(dest_hub__in=visible_hubs) | Q(supplier=request.user))
+
+    filters = request.GET
+    if filters.get("status") == "OPEN":
+        qs = qs.filter(status__in=OPEN_STATUSES)
+    elif filters.get("status"):
+        qs = qs.filter(status=filters["status"])
+    if filters.get("hub", "").isdigit():
+        qs = qs.filter(dest_hub_id=filters["hub"])
+    if filters.get("supplier", "").isdigit():
+        qs = qs.filter(supplier_id=filters["supplier"])
+
+    after = filters.get("after", "")
+    created_at, _, last_id = after.rpartition("|")
+    created_at = parse_datetime(created_at) if created_at else None
+    if created_at and last_id.isdigit():
+        qs = qs.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=last_id))
+
+    ships = list(qs[:SHIPMENTS_PAGE + 1])
+    next_after = ""
+    if len(ships) > SHIPMENTS_PAGE:
+        ships = ships[:SHIPMENTS_PAGE]
+        next_after = f"{ships[-1].created_at.isoformat()}|{ships[-1].id}"
+    params = filters.copy()
+    params.pop("after", None)
+
+    return render(request, "shipments_list.html", {
+        "ships": ships,
+        "filters": filters,
+        "filter_query": params.urlencode(),
+        "next_after": next_after,
+        "paged": bool(after),
+        "hubs": visible_hubs,
+        "suppliers": User.objects.filter(role="SUPPLIER").order_by("username") if request.user.is_superuser else [],
+        "statuses": Shipment._meta.get_field("status").choices,
+    })
 
 
 @require_role("SUPPLIER")  # change/remove as you prefer
 @login_required
 def shipment_new(request):
     """
-    Minimal shipment creator:
+    Create a shipment with all its lines in one go:
     - Choose destination hub
-    - Lines can be added in admin for now
+    - Type lines (SKU code or barcode + qty), or upload an ASN CSV (sku,qty)
+    SKUs resolve through one preloaded lookup; lines go in with one bulk insert.
     """
+    line_errors = []
     if request.method == "POST":
-        hub_id = int(request.POST["hub_id"])
-        hub = get_object_or_404(Hub, id=hub_id)
-        s = Shipment.objects.create(supplier=request.user, dest_hub=hub, status="PENDING")
-        messages.success(request, f"Created shipment #{s.id} to {hub.name}. Add lines in admin, then Receive.")
-        return redirect("shipments_list")
+        form = ShipmentCreateForm(request.POST, request.FILES)
+        formset = ShipmentLineFormSet(request.POST, prefix="lines")
+        if form.is_valid() and formset.is_valid():
+            hub = form.cleaned_data["hub"]
+            asn = form.cleaned_data.get("asn_file")
+            if asn:
+                rows, line_errors = read_sku_qty_csv(asn)
+            else:
+                rows = [
+                    (i, (f.cleaned_data.get("code") or "").strip(), f.cleaned_data.get("qty") or "")
+                    for i, f in enumerate(formset.forms, start=1)
+                ]
+            if not line_errors:
+                lines, errors = resolve_sku_qty_rows(rows, build_sku_lookup())
+                line_errors = [f"Line {n}: {msg}" for n, msg in sorted(errors.items())]
+                if not lines and not line_errors:
+                    line_errors = ["Add at least one line."]
+            if not line_errors:
+                s = create_shipment(request.user, hub, lines)
+                messages.success(request, f"Created shipment #{s.id} to {hub.name} with {len(lines)} lines.")
+                return redirect("shipments_list")
+    else:
+        form = ShipmentCreateForm()
+        formset = ShipmentLineFormSet(prefix="lines")
 
     # Suppliers may ship to any hub; hub managers would only see their own hub if you prefer
-    hubs = Hub.objects.all().order_by("name")
-    return render(request, "shipment_new.html", {"hubs": hubs})
+    return render(request, "shipment_new.html", {"form": form, "formset": formset, "line_errors": line_errors})
 
 
 @login_required
@@ -309,7 +433,7 @@ def shipment_receive(request, shipment_id):
     Mark a shipment as received and apply inventory deltas.
     Hub managers can only receive for their own hub.
     """
-    s = get_object_or_404(Shipment.objects.select_related("dest_hub"), id=shipment_id)
+    s = get_object_or_404(Shipment.objects.select_related("dest_hub", "supplier"), id=shipment_id)
 
     # Gate: only superuser or the manager of the destination hub
     visible_hubs = get_visible_hubs(request.user)
@@ -317,8 +441,31 @@ def shipment_receive(request, shipment_id):
         raise PermissionDenied("You do not have access to receive this shipment.")
 
     if request.method == "POST":
-        receive_shipment(request.user, s)
-        messages.success(request, f"Shipment {s.id} received.")
+        # Per-line quantities (qty-<line id>); blank means nothing received on that line.
+        quantities = {}
+        for key, value in request.POST.items():
+            if key.startswith("qty-") and key[4:].isdigit() and value.strip():
+                try:
+                    quantities[int(key[4:])] = int(value)
+                except ValueError:
+                    messages.error(request, f"'{value}' is not a whole number.")
+                    return redirect("shipment_receive", shipment_id=s.id)
+        try:
+            receipt = receive_shipment(request.user, s, quantities, close=bool(request.POST.get("close")))
+        except ValueError as e:
+            messages.error(request, str(e))
+            return redirect("shipment_receive", shipment_id=s.id)
+        if receipt is None:
+            messages.info(request, f"Shipment {s.id} was already received.")
+        else:
+            s.refresh_from_db(fields=["status"])
+            messages.success(request, f"Shipment {s.id}: receipt #{receipt.id} recorded ({s.status.lower()}).")
         return redirect("shipments_list")
 
-    return render(request, "shipment_receive.html", {"s": s})
+    # Lines with their SKU and the hub's current on-hand, in one query.
+    on_hand = (
+        Inventory.objects.filter(hub_id=s.dest_hub_id, sku_id=OuterRef("sku_id"))
+        .with_on_hand().values("on_hand")[:1]
+    )
+    lines = s.lines.select_related("sku").annotate(on_hand=Subquery(on_hand)).order_by("sku__sku")
+    return render(request, "shipment_receive.html", {"s": s, "lines": lines})
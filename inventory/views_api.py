@@ -0,0 +1,288 @@
+# inventory/views_api.py
+"""
+JSON endpoints for scanners and scripts. Session auth (CSRF token required on POST).
+"""
+import json
+from functools import wraps
+
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET, require_POST
+
+from .assignments import apply_assignments, STATES
+from .models import SKU, Hub, CountSession, Inventory, Reservation
+from .receiving import open_receipts
+from .reservations import consume, release, reserve
+from .stocktake import record_counts
+from .sync import pull_changes, apply_push
+from .utils import get_visible_hubs, build_sku_lookup, resolve_sku_qty_rows
+
+
+def api_login_required(view):
+    """Like login_required, but answers 401 JSON instead of redirecting to the login page."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return JsonResponse({"error": "Authentication required."}, status=401)
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+def _json_body(request):
+    """The request's JSON object, or None if the body isn't valid JSON or isn't an object."""
+    try:
+        body = json.loads(request.body or b"{}")
+    except ValueError:
+        return None
+    return body if isinstance(body, dict) else None
+
+
+@require_POST
+@api_login_required
+def api_hub_skus(request):
+    """
+    Bulk Hub ↔ SKU assignment (admin only).
+    Body: {"assignments": [{"sku": "<code>", "hub": <hub_id>, "state": "active|inactive|assign|unassign|remove"}, ...]}
+    """
+    if not request.user.is_superuser:
+        return JsonResponse({"error": "Admins only."}, status=403)
+    body = _json_body(request)
+    if body is None or not isinstance(body.get("assignments"), list):
+        return JsonResponse({"error": "Expected a JSON body with an 'assignments' list."}, status=400)
+
+    items = body["assignments"]
+    codes = {str(item.get("sku", "")) for item in items if isinstance(item, dict)}
+    sku_ids = dict(SKU.objects.filter(sku__in=codes).values_list("sku", "id"))
+    hub_ids = set(Hub.objects.values_list("id", flat=True))
+
+    desired, errors = {}, []
+    for i, item in enumerate(items):
+        if not isinstance(item, dict):
+            errors.append({"index": i, "error": "Expected an object."})
+            continue
+        sku_id = sku_ids.get(str(item.get("sku", "")))
+        hub_id = item.get("hub")
+        state = item.get("state", "active")
+        if sku_id is None:
+            errors.append({"index": i, "error": f"Unknown SKU {item.get('sku')!r}."})
+        elif hub_id not in hub_ids:
+            errors.append({"index": i, "error": f"Unknown hub {hub_id!r}."})
+        elif state not in STATES:
+            errors.append({"index": i, "error": f"State must be one of {', '.join(STATES)}."})
+        else:
+            desired[(hub_id, sku_id)] = state
+    if errors:
+        return JsonResponse({"errors": errors}, status=400)
+
+    return JsonResponse(apply_assignments(desired))
+
+
+@require_POST
+@api_login_required
+def api_stocktake_scans(request, session_id):
+    """
+    Scanner batch for an open count; quantities are added to the counts.
+    Body: {"scans": ["<code or barcode>", {"code": "<code>", "qty": 12}, ...]}
+    """
+    session = CountSession.objects.filter(id=session_id).first()
+    if session is None or not get_visible_hubs(request.user).filter(id=session.hub_id).exists():
+        return JsonResponse({"error": "Count not found."}, status=404)
+    body = _json_body(request)
+    if body is None or not isinstance(body.get("scans"), list):
+        return JsonResponse({"error": "Expected a JSON body with a 'scans' list."}, status=400)
+
+    rows = []
+    for i, scan in enumerate(body["scans"]):
+        if isinstance(scan, dict):
+            rows.append((i, str(scan.get("code", "")).strip(), scan.get("qty", 1)))
+        else:
+            rows.append((i, str(scan).strip(), 1))
+    counts, errors = resolve_sku_qty_rows(rows, build_sku_lookup(), min_qty=0)
+    if errors:
+        return JsonResponse({"errors": [{"index": i, "error": msg} for i, msg in sorted(errors.items())]}, status=400)
+    try:
+        n = record_counts(session, counts, add=True)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=409)
+    return JsonResponse({"skus": n})
+
+
+def _sync_hub(request, hub_id):
+    try:
+        return get_visible_hubs(request.user).get(id=int(hub_id))
+    except (TypeError, ValueError, Hub.DoesNotExist):
+        return None
+
+
+@require_GET
+@api_login_required
+def api_open_receipts(request):
+    """Shipments still to be received, oldest first: GET [?hub=<id>] (default: every visible hub)."""
+    hubs = get_visible_hubs(request.user)
+    if request.GET.get("hub"):
+        hub = _sync_hub(request, request.GET["hub"])
+        if hub is None:
+            return JsonResponse({"error": "Unknown or inaccessible hub."}, status=404)
+        hubs = [hub]
+    return JsonResponse({"shipments": [
+        {"id": s.id, "hub": s.dest_hub_id, "hub_name": s.dest_hub.name, "status": s.status,
+         "supplier": getattr(s.supplier, "username", ""), "created_at": s.created_at.isoformat(),
+         "lines": s.n_lines, "units": s.units or 0, "received": s.received or 0, "outstanding": s.outstanding or 0}
+        for s in open_receipts(hubs)[:500]
+    ]})
+
+
+@require_GET
+@api_login_required
+def api_sync_pull(request):
+    """
+    Delta pull for offline devices: GET ?hub=<id>&since=<token>.
+    Omit `since` for a full snapshot; then send back the "token" of the last
+    response. Keep pulling while "more" is true; on "reset", replace local data.
+    """
+    hub = _sync_hub(request, request.GET.get("hub") or getattr(request.user, "hub_id", None))
+    if hub is None:
+        return JsonResponse({"error": "Unknown or inaccessible hub."}, status=404)
+    try:
+        return JsonResponse(pull_changes(hub.id, request.GET.get("since", "")))
+    except ValueError:
+        return JsonResponse({"error": "since must be a change token."}, status=400)
+
+
+@require_POST
+@api_login_required
+def api_sync_push(request):
+    """
+    Push queued offline adjustments. Each op carries a client idempotency key;
+    re-sending an op returns the original result instead of applying it again.
+    Body: {"device": "<device id>", "hub": <hub_id>,
+           "ops": [{"key": "<uuid>", "sku": "<code or barcode>", "delta": -2, "note": ""}, ...]}
+    """
+    body = _json_body(request)
+    if body is None or not isinstance(body.get("ops"), list) or not body.get("device"):
+        return JsonResponse({"error": "Expected a JSON body with 'device' and an 'ops' list."}, status=400)
+    hub = _sync_hub(request, body.get("hub") or getattr(request.user, "hub_id", None))
+    if hub is None:
+        return JsonResponse({"error": "Unknown or inaccessible hub."}, status=404)
+
+    device = str(body["device"])[:64]
+    lookup = build_sku_lookup()
+    ops = [op if isinstance(op, dict) else {} for op in body["ops"]]
+    skus = SKU.objects.in_bulk({lookup.get(str(op.get("sku", "")).strip()) for op in ops} - {None})
+    results = []
+    for op in ops:
+        key = str(op.get("key", ""))
+        if not key:
+            results.append({"key": key, "status": "INVALID", "error": "Missing idempotency key."})
+            continue
+        sku = skus.get(lookup.get(str(op.get("sku", "")).strip()))
+        try:
+            delta = int(op.get("delta"))
+        except (TypeError, ValueError):
+            delta = None
+        if sku is None or delta is None:
+            results.append({"key": key, "status": "INVALID", "error": "Unknown SKU or bad delta."})
+            continue
+        push, duplicate = apply_push(request.user, device, hub, sku, delta, key[:64], note=op.get("note") or "")
+        results.append({"key": key, "status": push.status, "error": push.error, "duplicate": duplicate})
+    return JsonResponse({"results": results})
+
+
+AVAILABILITY_MAX_SKUS = 1000
+
+
+@require_GET
+@api_login_required
+def api_availability(request):
+    """
+    Available-to-promise for many SKUs across hubs, in one query:
+    GET ?skus=<code>,<code>,...[&hubs=<id>,<id>] (default: every visible hub).
+    {"availability": {"<code>": {"<hub id>": {"on_hand", "reserved", "available"}}}, "missing": [codes]}
+    SKUs with no stock row at a hub are simply absent for that hub.
+    """
+    codes = [c.strip() for c in request.GET.get("skus", "").split(",") if c.strip()]
+    if not codes or len(codes) > AVAILABILITY_MAX_SKUS:
+        return JsonResponse({"error": f"Pass 1 to {AVAILABILITY_MAX_SKUS} SKU codes in 'skus'."}, status=400)
+    hubs = get_visible_hubs(request.user)
+    if request.GET.get("hubs"):
+        try:
+            hubs = hubs.filter(id__in=[int(h) for h in request.GET["hubs"].split(",") if h.strip()])
+        except ValueError:
+            return JsonResponse({"error": "hubs must be hub ids."}, status=400)
+
+    availability = {}
+    rows = (
+        Inventory.objects.filter(hub__in=hubs, sku__sku__in=codes)
+        .with_available()
+        .values_list("sku__sku", "hub_id", "on_hand", "reserved", "available")
+    )
+    for code, hub_id, on_hand, reserved, available in rows:
+        availability.setdefault(code, {})[hub_id] = {
+            "on_hand": on_hand, "reserved": reserved, "available": available,
+        }
+    return JsonResponse({"availability": availability, "missing": [c for c in codes if c not in availability]})
+
+
+def _reservation_json(r):
+    return {"id": r.id, "hub": r.hub_id, "sku_id": r.sku_id, "qty": r.qty, "reference": r.reference,
+            "status": r.status, "expires_at": r.expires_at.isoformat()}
+
+
+@require_POST
+@api_login_required
+def api_reserve(request):
+    """
+    Hold stock for an order.
+    Body: {"hub": <id>, "sku": "<code or barcode>", "qty": 2, "ttl": 900, "reference": "<order id>"}
+    A repeated reference returns the existing reservation; 409 if it has ended or
+    was for another qty, or if not enough is available.
+    """
+    body = _json_body(request)
+    if body is None:
+        return JsonResponse({"error": "Expected a JSON body."}, status=400)
+    hub = _sync_hub(request, body.get("hub") or getattr(request.user, "hub_id", None))
+    if hub is None:
+        return JsonResponse({"error": "Unknown or inaccessible hub."}, status=404)
+    sku_id = build_sku_lookup().get(str(body.get("sku", "")).strip())
+    if sku_id is None:
+        return JsonResponse({"error": f"Unknown or ambiguous SKU {body.get('sku')!r}."}, status=400)
+    try:
+        qty = int(body.get("qty", 1))
+        ttl = int(body["ttl"]) if body.get("ttl") else None
+    except (TypeError, ValueError):
+        return JsonResponse({"error": "qty and ttl must be whole numbers."}, status=400)
+    try:
+        r = reserve(request.user, hub, SKU(pk=sku_id), qty, ttl=ttl, reference=str(body.get("reference", ""))[:64])
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=409)
+    return JsonResponse(_reservation_json(r), status=201)
+
+
+def _visible_reservation(request, reservation_id):
+    return Reservation.objects.filter(
+        id=reservation_id, hub__in=get_visible_hubs(request.user),
+    ).select_related("hub", "sku").first()
+
+
+@require_POST
+@api_login_required
+def api_reservation_release(request, reservation_id):
+    r = _visible_reservation(request, reservation_id)
+    if r is None:
+        return JsonResponse({"error": "Reservation not found."}, status=404)
+    release(r)
+    r.refresh_from_db()
+    return JsonResponse(_reservation_json(r))
+
+
+@require_POST
+@api_login_required
+def api_reservation_consume(request, reservation_id):
+    """The order shipped: take the held units out of stock."""
+    r = _visible_reservation(request, reservation_id)
+    if r is None:
+        return JsonResponse({"error": "Reservation not found."}, status=404)
+    try:
+        r = consume(request.user, r)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=409)
+    return JsonResponse(_reservation_json(r))
@@ -0,0 +1,78 @@
+# inventory/views_events.py
+"""
+Server-sent events stream of stock changes. Needs the ASGI app
+(tribe_inventory.asgi, e.g. uvicorn/daphne) and settings.LIVE_EVENTS: under
+WSGI every open stream would pin a worker, so there it answers 204, which
+tells EventSource to stop reconnecting.
+"""
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, StreamingHttpResponse
+
+from .events import broadcaster, fetch_events
+from .utils import get_visible_hubs
+
+KEEPALIVE_SECONDS = 25
+
+
+def _scope(user, hub_param):
+    hubs = get_visible_hubs(user)
+    if hub_param:
+        hubs = hubs.filter(id=hub_param)
+    return list(hubs.values_list("id", flat=True))
+
+
+async def stock_events(request):
+    """
+    GET ?hub=<id> (optional) → text/event-stream of
+      event: stock / data: {"token", "hub", "sku_id", "sku", "qty"}
+    Reconnecting clients send Last-Event-ID and get the changes they missed.
+    """
+    if not settings.LIVE_EVENTS or not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+    user = await request.auser()
+    if not user.is_authenticated:
+        return HttpResponse("Authentication required.", status=401)
+    try:
+        hub_ids = await sync_to_async(_scope)(user, int(request.GET.get("hub") or 0))
+    except ValueError:
+        return HttpResponse("hub must be an id.", status=400)
+    if not hub_ids:
+        return HttpResponse("No visible hubs.", status=403)
+
+    try:
+        last_event_id = int(request.headers.get("Last-Event-ID") or 0)
+    except ValueError:
+        last_event_id = 0
+
+    async def stream():
+        queue = broadcaster.subscribe(hub_ids)
+        try:
+            yield "retry: 5000\n\n"
+            # Subscribed first, so changes during the replay also reach the queue; skip those sent twice.
+            replayed = set()
+            if last_event_id:
+                missed, _ = await sync_to_async(fetch_events)(last_event_id, hub_ids)
+                for event in missed:
+                    replayed.add(event["token"])
+                    yield f"id: {event['token']}\nevent: stock\ndata: {json.dumps(event)}\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if event["token"] in replayed:
+                    continue
+                yield f"id: {event['token']}\nevent: stock\ndata: {json.dumps(event)}\n\n"
+        finally:
+            broadcaster.unsubscribe(queue)
+
+    response = StreamingHttpResponse(stream(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # don't let nginx buffer the stream
+    return response
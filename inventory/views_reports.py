@@ -0,0 +1,80 @@
+# inventory/views_reports.py
+import csv
+from datetime import timedelta
+
+from django.contrib.auth.decorators import login_required
+from django.db.models import F, Sum
+from django.db.models.functions import TruncMonth, TruncWeek
+from django.http import Http404, HttpResponse
+from django.shortcuts import render
+from django.utils.dateparse import parse_date
+from django.utils.timezone import localdate
+
+from .models import DailyMovement
+from .utils import get_visible_hubs
+
+PERIODS = {"day": F("day"), "week": TruncWeek("day"), "month": TruncMonth("day")}
+MAX_HTML_ROWS = 1000
+
+
+def _date(value):
+    """YYYY-MM-DD → date; None if missing, malformed or not a real day (2024-02-30)."""
+    try:
+        return parse_date(value or "")
+    except ValueError:
+        return None
+
+
+@login_required
+def movement_report(request):
+    """
+    Inbound (receipts / manual) vs outbound movement per hub by day, week or month,
+    read from the DailyMovement rollup (run `manage.py rollup_movements`).
+    Query: ?period=day|week|month&start=YYYY-MM-DD&end=YYYY-MM-DD&hub=<id>&sku=<code>&by_sku=1&format=csv
+    """
+    period = request.GET.get("period") if request.GET.get("period") in PERIODS else "day"
+    end = _date(request.GET.get("end")) or localdate()
+    start = _date(request.GET.get("start")) or end - timedelta(days=365)
+    by_sku = request.GET.get("by_sku") == "1"
+    hubs = get_visible_hubs(request.user).order_by("name")
+
+    qs = DailyMovement.objects.filter(hub__in=hubs, day__range=(start, end))
+    if request.GET.get("hub"):
+        hub_id = request.GET["hub"]
+        if not hub_id.isdigit() or not hubs.filter(id=hub_id).exists():
+            raise Http404("Unknown or inaccessible hub.")
+        qs = qs.filter(hub_id=hub_id)
+    if request.GET.get("sku"):
+        qs = qs.filter(sku__sku=request.GET["sku"].strip())
+
+    group = ["period", "hub__name"] + (["sku__sku"] if by_sku else [])
+    rows = (
+        qs.annotate(period=PERIODS[period])
+        .values(*group)
+        .annotate(
+            inbound_receipts=Sum("inbound_receipts"),
+            inbound_manual=Sum("inbound_manual"),
+            outbound=Sum("outbound"),
+            net=Sum("net"),
+        )
+        .order_by("-period", *group[1:])
+    )
+
+    if request.GET.get("format") == "csv":
+        response = HttpResponse(content_type="text/csv")
+        response["Content-Disposition"] = f'attachment; filename="movements_{period}_{start}_{end}.csv"'
+        w = csv.writer(response)
+        w.writerow([period, "hub"] + (["sku"] if by_sku else []) + ["inbound_receipts", "inbound_manual", "outbound", "net"])
+        for r in rows:
+            w.writerow([r["period"], r["hub__name"]] + ([r["sku__sku"]] if by_sku else [])
+                       + [r["inbound_receipts"], r["inbound_manual"], r["outbound"], r["net"]])
+        return response
+
+    rows = list(rows[:MAX_HTML_ROWS + 1])
+    return render(request, "movement_report.html", {
+        "rows": rows[:MAX_HTML_ROWS],
+        "truncated": len(rows) > MAX_HTML_ROWS,
+        "period": period, "start": start, "end": end, "by_sku": by_sku,
+        "hubs": hubs, "hub_id": request.GET.get("hub", ""), "sku": request.GET.get("sku", ""),
+        "periods": list(PERIODS),
+    })
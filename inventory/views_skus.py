@@ -3,43 +3,58 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.shortcuts import render, redirect, get_object_or_404
 from django.core.exceptions import PermissionDenied
-from django.http import HttpResponse
-import csv, io
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.http import HttpResponse, HttpResponseBadRequest
+from django.db import transaction
+from django.utils.timezone import now
+from datetime import timedelta
 
-from .models import SKU, Hub, HubSKU
+from .models import SKU, Hub, HubSKU, SKUUploadPlan
 from .utils import get_visible_hubs
+from .cache import scope_key
+from .assignments import apply_assignments, ACTIVE, UNASSIGN
+from .catalog import Changeset, apply_changeset, plan_upload
+
+UPLOAD_PLAN_TTL = timedelta(hours=1)
 
 @login_required
 def skus_upload(request):
-    """Upload a CSV of SKUs with columns: sku,name,barcode,low_stock_threshold"""
+    """
+    Upload a CSV of SKUs (sku,name,barcode,low_stock_threshold; see catalog.plan_upload).
+    Step 1 shows the planned changes; step 2 applies exactly that plan (kept
+    in SKUUploadPlan, so any worker can confirm it and the file isn't parsed twice).
+    """
     if not request.user.is_superuser:
         raise PermissionDenied
 
-    if request.method == "POST" and request.FILES.get("file"):
-        f = request.FILES["file"]
-        data = f.read().decode("utf-8", errors="ignore")
-        reader = csv.DictReader(io.StringIO(data))
-        created = 0
-        updated = 0
-        for row in reader:
-            sku_code = (row.get("sku") or "").strip()
-            if not sku_code:
-                continue
-            name = (row.get("name") or "").strip()
-            barcode = (row.get("barcode") or "").strip()
-            try:
-                low = int(row.get("low_stock_threshold") or 5)
-            except:
-                low = 5
-            obj, is_new = SKU.objects.update_or_create(
-                sku=sku_code,
-                defaults={"name": name or sku_code, "barcode": barcode, "low_stock_threshold": low},
-            )
-            created += 1 if is_new else 0
-            updated += 0 if is_new else 1
-        messages.success(request, f"Upload complete. Created {created}, Updated {updated}.")
+    if request.method == "POST" and request.POST.get("plan"):
+        with transaction.atomic():
+            plan = SKUUploadPlan.objects.select_for_update().filter(
+                id=request.POST["plan"] if request.POST["plan"].isdigit() else 0,
+                user=request.user, created_at__gte=now() - UPLOAD_PLAN_TTL,
+            ).first()
+            if plan is None:
+                messages.error(request, "That preview has expired; please upload the file again.")
+                return redirect("skus_upload")
+            plan.delete()  # a double submit finds nothing to apply
+            result = apply_changeset(Changeset.from_dict(plan.data))
+        messages.success(
+            request,
+            f"Upload complete. Created {result['created']}, Updated {result['updated']}.",
+        )
         return redirect("skus_upload")
 
+    if request.method == "POST" and request.FILES.get("file"):
+        try:
+            cs = plan_upload(request.FILES["file"], workers=1)
+        except ValueError as e:
+            messages.error(request, str(e))
+            return redirect("skus_upload")
+        SKUUploadPlan.objects.filter(created_at__lt=now() - UPLOAD_PLAN_TTL).delete()
+        plan = SKUUploadPlan.objects.create(user=request.user, data=cs.to_dict())
+        return render(request, "skus_upload.html", {"cs": cs, "summary": cs.summary(), "plan": plan.id})
+
     return render(request, "skus_upload.html")
 
 @login_required
@@ -51,13 +66,16 @@ def skus_by_hub(request, hub_id=None):
 
     if hub_id:
         hub = get_object_or_404(hubs, id=hub_id)
-        assignments = HubSKU.objects.select_related("hub", "sku").filter(hub=hub).order_by("sku__sku")
-        return render(request, "skus_by_hub.html", {"hub": hub, "assignments": assignments, "hubs": hubs})
+    else:
+        # no hub selected — show first or list
+        hub = hubs.first()
 
-    # no hub selected — show first or list
-    hub = hubs.first()
-    assignments = HubSKU.objects.select_related("hub", "sku").filter(hub=hub).order_by("sku__sku") if hub else []
-    return render(request, "skus_by_hub.html", {"hub": hub, "assignments": assignments, "hubs": hubs})
+    # assignments stay lazy: only evaluated when the cached fragment is missing
+    assignments = HubSKU.objects.select_related("hub", "sku").filter(hub=hub, active=True).order_by("sku__sku") if hub else []
+    cache_scope = scope_key([hub.id]) if hub else ""
+    return render(request, "skus_by_hub.html", {
+        "hub": hub, "assignments": assignments, "hubs": hubs, "cache_scope": cache_scope,
+    })
 
 @login_required
 def sku_assign(request, sku_id):
@@ -71,13 +89,57 @@ def sku_assign(request, sku_id):
         hub_id = request.POST.get("hub_id")
         hub = get_object_or_404(Hub, id=hub_id)
         if action == "assign":
-            HubSKU.objects.get_or_create(hub=hub, sku=sku)
+            apply_assignments({(hub.id, sku.id): ACTIVE})
             messages.success(request, f"Assigned {sku.sku} to {hub.name}.")
         elif action == "unassign":
-            HubSKU.objects.filter(hub=hub, sku=sku).delete()
+            # deactivate rather than delete: keeps the reorder point and counter shards
+            apply_assignments({(hub.id, sku.id): UNASSIGN})
             messages.success(request, f"Removed {sku.sku} from {hub.name}.")
         return redirect("skus_by_hub_detail", hub_id=hub.id)
 
     hubs = Hub.objects.all().order_by("name")
-    assigned_ids = set(HubSKU.objects.filter(sku=sku).values_list("hub_id", flat=True))
+    assigned_ids = set(HubSKU.objects.filter(sku=sku, active=True).values_list("hub_id", flat=True))
     return render(request, "sku_assign.html", {"sku": sku, "hubs": hubs, "assigned_ids": assigned_ids})
+
+@login_required
+def sku_matrix(request):
+    """
+    Hub × SKU assignment matrix (admin only).
+    A checked cell means "assigned" (active); unchecking deactivates the HubSKU
+    row, keeping its reorder point and counter shards.
+    The whole page is applied in one go (see assignments.apply_assignments).
+    """
+    if not request.user.is_superuser:
+        raise PermissionDenied
+    hubs = list(Hub.objects.all().order_by("name"))
+
+    if request.method == "POST":
+        try:
+            sku_ids = [int(x) for x in request.POST.getlist("sku_ids")]
+        except ValueError:
+            return HttpResponseBadRequest("sku_ids must be SKU ids.")
+        checked = set(request.POST.getlist("cell"))
+        desired = {
+            (h.id, sku_id): ACTIVE if f"{h.id}-{sku_id}" in checked else UNASSIGN
+            for h in hubs for sku_id in sku_ids
+        }
+        result = apply_assignments(desired)
+        messages.success(
+            request,
+            f"Assignments saved. Created {result['created']}, updated {result['updated']}.",
+        )
+        return redirect(request.get_full_path())
+
+    q = (request.GET.get("q") or "").strip()
+    skus = SKU.objects.order_by("sku")
+    if q:
+        skus = skus.filter(Q(sku__icontains=q) | Q(name__icontains=q) | Q(barcode=q))
+    page = Paginator(skus, 200).get_page(request.GET.get("page"))
+
+    links = HubSKU.objects.filter(sku__in=[s.id for s in page]).values_list("hub_id", "sku_id", "active")
+    state = {(hub_id, sku_id): active for hub_id, sku_id, active in links}
+    rows = [
+        {"sku": sku, "cells": [(h.id, state.get((h.id, sku.id))) for h in hubs]}
+        for sku in page
+    ]
+    return render(request, "sku_matrix.html", {"hubs": hubs, "rows": rows, "page": page, "q": q})
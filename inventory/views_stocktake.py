@@ -0,0 +1,90 @@
+# inventory/views_stocktake.py
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.core.exceptions import PermissionDenied
+from django.shortcuts import render, redirect, get_object_or_404
+from django.views.decorators.http import require_POST
+
+from .models import CountSession, Hub
+from .stocktake import open_count, record_counts, compute_variances, apply_count
+from .utils import get_visible_hubs, build_sku_lookup, read_sku_qty_csv, resolve_sku_qty_rows
+
+
+def _session_for(request, session_id):
+    """Fetch a count session, only if its hub is visible to the user."""
+    session = get_object_or_404(CountSession.objects.select_related("hub"), id=session_id)
+    if not get_visible_hubs(request.user).filter(id=session.hub_id).exists():
+        raise PermissionDenied("You do not have access to this hub.")
+    return session
+
+
+@login_required
+def stocktake_list(request):
+    """List recent counts for visible hubs; POST opens a new count (freezes the baseline)."""
+    visible_hubs = get_visible_hubs(request.user)
+
+    if request.method == "POST":
+        hub = get_object_or_404(visible_hubs, id=request.POST.get("hub_id"))
+        session = open_count(request.user, hub)
+        messages.success(request, f"Opened count #{session.id} for {hub.name}.")
+        return redirect("stocktake_detail", session_id=session.id)
+
+    sessions = (
+        CountSession.objects.select_related("hub", "opened_by")
+        .filter(hub__in=visible_hubs)
+        .order_by("-created_at")[:50]
+    )
+    return render(request, "stocktake_list.html", {"sessions": sessions, "hubs": visible_hubs.order_by("name")})
+
+
+@login_required
+def stocktake_detail(request, session_id):
+    """
+    Variance sheet for a count. POST uploads counted quantities (CSV: sku,qty),
+    either replacing counts ("set") or adding to them ("add", e.g. per aisle).
+    """
+    session = _session_for(request, session_id)
+    errors = []
+
+    if request.method == "POST" and request.FILES.get("file"):
+        rows, errors = read_sku_qty_csv(request.FILES["file"])
+        if not errors:
+            counts, line_errors = resolve_sku_qty_rows(rows, build_sku_lookup(), min_qty=0)
+            errors = [f"Line {n}: {msg}" for n, msg in sorted(line_errors.items())]
+        if not errors:
+            try:
+                n = record_counts(session, counts, add=request.POST.get("mode") == "add")
+                messages.success(request, f"Recorded counts for {n} SKUs.")
+                return redirect("stocktake_detail", session_id=session.id)
+            except ValueError as e:
+                errors = [str(e)]
+
+    zero_uncounted = request.GET.get("all") == "1"
+    rows = compute_variances(session, zero_uncounted=zero_uncounted)
+    return render(request, "stocktake_detail.html", {
+        "session": session,
+        "rows": rows,
+        "changes": sum(1 for r in rows if r["delta"]),
+        "zero_uncounted": zero_uncounted,
+        "errors": errors,
+    })
+
+
+@require_POST
+@login_required
+def stocktake_apply(request, session_id):
+    """Apply all corrections (or cancel the count)."""
+    session = _session_for(request, session_id)
+    try:
+        if request.POST.get("action") == "cancel":
+            if session.status != "OPEN":
+                raise ValueError(f"Count #{session.id} is {session.status.lower()}.")
+            session.status = "CANCELLED"
+            session.save(update_fields=["status"])
+            messages.success(request, f"Count #{session.id} cancelled.")
+        else:
+            n = apply_count(request.user, session, zero_uncounted=request.POST.get("zero_uncounted") == "1")
+            messages.success(request, f"Count #{session.id} applied: {n} SKUs corrected.")
+    except ValueError as e:
+        messages.error(request, str(e))
+    return redirect("stocktake_detail", session_id=session.id)
@@ -0,0 +1,119 @@
+# inventory/warmup.py
+"""
+Worker warm-up: do the first-request work before the worker takes traffic.
+
+run() opens the database connections, imports the URLconf (and with it the
+views and admin), compiles every project template into the cached template
+loader, and primes the cache-backed lookups (fragment versions, SKU lookup,
+shard counts). It is called from gunicorn's post_worker_init hook (see
+gunicorn.conf.py), i.e. once per worker after the fork, so no connection is
+shared between processes. start() runs it in a background thread instead:
+asgi.py calls it for uvicorn/daphne, and /readyz does if nothing has
+(runserver). /readyz answers 503 until it has finished, then 200.
+"""
+import logging
+import threading
+import time
+from pathlib import Path
+
+from django.core.cache import cache
+from django.db import connections
+from django.template import engines
+from django.template.loaders.cached import Loader as CachedLoader
+from django.urls import get_resolver
+
+logger = logging.getLogger(__name__)
+
+state = {"ready": False, "timings": {}, "errors": []}
+_lock = threading.Lock()
+
+
+def record(step, seconds):
+    """Store a timing (seconds) for the readiness report; also used by wsgi/asgi for the import phase."""
+    state["timings"][step] = round(seconds * 1000, 1)  # ms
+
+
+def _connections():
+    for conn in connections.all():
+        conn.ensure_connection()
+
+
+def _urlconf():
+    get_resolver().url_patterns  # imports views, admin, forms
+
+
+def _templates():
+    """Compile every project template (TEMPLATES DIRS) into the cached loader; returns how many."""
+    compiled = 0
+    for engine in engines.all():
+        django_engine = getattr(engine, "engine", None)
+        if django_engine is None or not any(isinstance(l, CachedLoader) for l in django_engine.template_loaders):
+            continue  # no cached loader: nothing would keep the compiled templates
+        for base in django_engine.dirs:
+            for path in sorted(Path(base).rglob("*.html")):
+                engine.get_template(path.relative_to(base).as_posix())
+                compiled += 1
+    return compiled
+
+
+def _lookups():
+    from .cache import scope_key
+    from .models import Hub, HubSKU
+    from .sharding import SHARDS_KEY, SHARDS_TTL
+    from .utils import build_sku_lookup
+
+    scope_key(Hub.objects.values_list("id", flat=True))  # fragment versions for every hub
+    build_sku_lookup()
+    cache.set_many({
+        SHARDS_KEY.format(hub_id, sku_id): n
+        for hub_id, sku_id, n in HubSKU.objects.filter(counter_shards__gt=0).values_list("hub_id", "sku_id", "counter_shards")
+    }, SHARDS_TTL)
+
+
+STEPS = [("db_connect", _connections), ("urlconf", _urlconf), ("templates", _templates), ("lookups", _lookups)]
+
+
+def _warm_up():
+    """Run every step unless done already; the caller holds _lock. True if it ran them."""
+    if state["ready"]:
+        return False
+    started = time.perf_counter()
+    for name, step in STEPS:
+        t0 = time.perf_counter()
+        try:
+            result = step()
+        except Exception as e:  # a cold cache is slow, not fatal: still become ready
+            state["errors"].append(f"{name}: {e!r}")
+            logger.exception("warm-up step %s failed", name)
+            result = None
+        record(name, time.perf_counter() - t0)
+        if result is not None:
+            state[name] = result
+    record("warmup_total", time.perf_counter() - started)
+    state["ready"] = True
+    return True
+
+
+def run(log=None):
+    """Run every warm-up step once per process (later calls return at once). Blocks until done; never raises."""
+    with _lock:
+        ran = _warm_up()
+    if ran:
+        (log or logger.info)(f"warm-up done: {state['timings']}")
+    return state
+
+
+def start():
+    """Run the warm-up in a background thread, unless it is done or already running. Never blocks."""
+    if state["ready"] or not _lock.acquire(blocking=False):
+        return
+
+    def work():
+        try:
+            if _warm_up():
+                logger.info(f"warm-up done: {state['timings']}")
+        finally:
+            connections.close_all()  # this thread's connections only
+            _lock.release()
+
+    threading.Thread(target=work, name="warmup", daemon=True).start()
@@ -1,4 +1,12 @@
 import os
+import time
+
+_started = time.perf_counter()
 from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tribe_inventory.settings')
 application = get_asgi_application()
+
+from inventory import warmup  # noqa: E402  (needs the app registry)
+warmup.record("django_setup", time.perf_counter() - _started)
+
+warmup.start()  # in a thread: servers may import this module inside their event loop, where Django refuses DB access
@@ -1,6 +1,7 @@
 from pathlib import Path
 import os
 import dj_database_url
+from django.core.exceptions import ImproperlyConfigured
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -41,8 +42,15 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / 'inventory' / 'templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
+            # Compiled templates are kept per process; inventory/warmup.py fills
+            # this cache at worker start (the dev server still reloads on edits).
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -60,8 +68,70 @@ DATABASES = {
     'default': dj_database_url.config(default=f'sqlite:///{BASE_DIR / "db.sqlite3"}', conn_max_age=600)
 }
 
+# SQLite (small single-box hubs): WAL so readers don't block the writer, and
+# IMMEDIATE transactions so every atomic block takes the write lock up front
+# (select_for_update is a no-op on SQLite; this is what serializes adjust_stock).
+# Writers wait up to SQLITE_BUSY_TIMEOUT seconds for the lock, then
+# inventory.db.retry_on_db_lock backs off and retries.
+if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+    DATABASES['default'].setdefault('OPTIONS', {}).update({
+        'transaction_mode': 'IMMEDIATE',
+        'timeout': float(os.getenv('SQLITE_BUSY_TIMEOUT', '20')),
+        'init_command': (
+            'PRAGMA journal_mode=WAL;'
+            f"PRAGMA synchronous={os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')};"
+        ),
+    })
+    # Tests on a file, not the default shared-cache memory database: there WAL and the
+    # busy timeout don't apply, so inventory/tests/test_concurrency.py's threads would
+    # fail on table locks instead of queueing for the write lock.
+    DATABASES['default'].setdefault('TEST', {}).setdefault('NAME', str(BASE_DIR / 'test_db.sqlite3'))
+
+# Cache (template fragments are keyed by per-hub data versions, see inventory/cache.py).
+# It has to be shared by every process that serves or changes data (all gunicorn
+# workers, manage.py commands), so the default is the file backend: fine on one box.
+# Several boxes: point CACHE_BACKEND/CACHE_LOCATION at Redis or Memcached.
+# LocMemCache is per-process; with it, versions expire after a few seconds
+# (see inventory/cache.py).
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache')
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': os.getenv('CACHE_LOCATION', str(BASE_DIR / '.cache')),
+        'OPTIONS': {'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', '5000'))},
+    }
+}
+
+# Live stock events (inventory/events.py). Only when served by the ASGI app
+# (uvicorn/daphne): under WSGI every open stream would hold a worker forever, so
+# pages don't open one and the endpoint answers 204 unless LIVE_EVENTS=true.
+LIVE_EVENTS = os.getenv('LIVE_EVENTS', 'False').lower() == 'true'
+# How often each process polls the DB for changes committed by other workers.
+# 0 = in-process notifications only (one worker).
+EVENTS_POLL_SECONDS = float(os.getenv('EVENTS_POLL_SECONDS', '5'))
+
 AUTH_USER_MODEL = 'inventory.User'
 
+# Sessions and request.user come from the cache (falling back to the DB on a miss),
+# so an authenticated request costs no fixed queries. That is only coherent with a
+# cache shared by all processes (see CACHES above): a logout or a deactivated user
+# would otherwise stay live in the other workers. With a per-process cache, sessions
+# live in the DB and CachedModelBackend reads the user from the DB every time.
+PER_PROCESS_CACHE = CACHE_BACKEND.endswith(('LocMemCache', 'DummyCache'))
+SESSION_ENGINE = os.getenv(
+    'SESSION_ENGINE',
+    'django.contrib.sessions.backends.db' if PER_PROCESS_CACHE else 'django.contrib.sessions.backends.cached_db',
+)
+if PER_PROCESS_CACHE and SESSION_ENGINE.endswith(('.cache', '.cached_db')):
+    raise ImproperlyConfigured(f"SESSION_ENGINE={SESSION_ENGINE} needs a shared cache, not {CACHE_BACKEND}.")
+# Cached users also expire, for changes no signal sees (queryset.update(), raw SQL).
+USER_CACHE_SECONDS = int(os.getenv('USER_CACHE_SECONDS', '300'))
+AUTHENTICATION_BACKENDS = [
+    'inventory.auth.CachedModelBackend',
+    # keeps sessions created before the cached backend valid
+    'django.contrib.auth.backends.ModelBackend',
+]
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},
@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.urls import path, include
 from django.contrib.auth import views as auth_views
-from inventory.views import home, healthcheck, logout_get  # our GET logout
+from inventory.views import home, healthcheck, logout_get, readyz  # our GET logout
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -9,6 +9,7 @@ urlpatterns = [
     # main dashboard + healthcheck
     path('', home, name='home'),
     path('healthz/', healthcheck, name='healthcheck'),
+    path('readyz/', readyz, name='readyz'),
 
     # login
     path('login/', auth_views.LoginView.as_view(
@@ -1,4 +1,10 @@
 import os
+import time
+
+_started = time.perf_counter()
 from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tribe_inventory.settings')
 application = get_wsgi_application()
+
+from inventory import warmup  # noqa: E402  (needs the app registry)
+warmup.record("django_setup", time.perf_counter() - _started)